@@ -1,5 +1,7 @@
 # Imports
-from utils import read_json_config, accn, numerical_integration, at_aphelion, plot_simulated_data
+import sys
+from utils import read_json_config, accn, numerical_integration, at_aphelion, at_apsides, \
+    stream_orbit, write_orbit_stream, plot_simulated_data, plot_batch_data
 import numpy as np
 
 def setup_simulation(config):
@@ -12,6 +14,7 @@ def setup_simulation(config):
     time_step = config['time_settings']['time_step'] # sec
     max_time = config['time_settings']['simulation_time']*24*3600 # sec
     method_integration = config['numerical_integration']['method'] 
+    backend = config['numerical_integration'].get('backend', 'fast')
 
     # Time array for numerical solution
     t = np.arange(0, max_time, time_step)
@@ -23,25 +26,148 @@ def setup_simulation(config):
     # Set initial conditions for position and velocity
     r[0], v[0] = np.array([initial_position, 0]), np.array([0, -initial_velocity])
 
-    return planet_name, color_at_perihelion, color_at_aphelion, r, v, t, time_step, method_integration
- 
-# Read config.json
-config = read_json_config("config.json")
+    return planet_name, color_at_perihelion, color_at_aphelion, r, v, t, time_step, method_integration, backend
+
+def setup_batch_simulation(config):
+    # Access configuration values (one entry of "bodies" per planet)
+    bodies = config['bodies']
+    planet_names = [body['name'] for body in bodies]
+    colors_at_perihelion = [body['perihelion_color'] for body in bodies]
+    colors_at_aphelion = [body['aphelion_color'] for body in bodies]
+    initial_positions = np.array([body['position_at_perihelion'] for body in bodies])*1e9 # m
+    initial_velocities = np.array([body['velocity_at_perihelion'] for body in bodies])*1e3 # m/s
+    time_step = config['time_settings']['time_step'] # sec
+    max_time = config['time_settings']['simulation_time']*24*3600 # sec
+    method_integration = config['numerical_integration']['method']
+    backend = config['numerical_integration'].get('backend', 'fast')
+
+    # Time array for numerical solution
+    t = np.arange(0, max_time, time_step)
+
+    # Initialize (T, K, 2) arrays to store positions and velocities of the K planets at all time steps
+    r = np.empty(shape=(len(t), len(bodies), 2))
+    v = np.empty(shape=(len(t), len(bodies), 2))
+
+    # Set initial conditions for position and velocity
+    r[0, :, 0], r[0, :, 1] = initial_positions, 0
+    v[0, :, 0], v[0, :, 1] = 0, -initial_velocities
+
+    return planet_names, colors_at_perihelion, colors_at_aphelion, r, v, t, time_step, method_integration, backend
+
+def setup_streaming_simulation(config):
+    # Access configuration values (a single planet or the "bodies" list)
+    bodies = config['bodies'] if 'bodies' in config else [dict(config['planet_info'], **config['initial_conditions'])]
+    planet_names = [body['name'] for body in bodies]
+    colors_at_perihelion = [body['perihelion_color'] for body in bodies]
+    colors_at_aphelion = [body['aphelion_color'] for body in bodies]
+    initial_positions = np.array([body['position_at_perihelion'] for body in bodies])*1e9 # m
+    initial_velocities = np.array([body['velocity_at_perihelion'] for body in bodies])*1e3 # m/s
+    time_step = config['time_settings']['time_step'] # sec
+    max_time = config['time_settings']['simulation_time']*24*3600 # sec
+    method_integration = config['numerical_integration']['method']
+    backend = config['numerical_integration'].get('backend', 'fast')
+    streaming = config['streaming']
+
+    # Number of time steps (same as the time array of setup_simulation), nothing is preallocated
+    steps = int(np.ceil(max_time / time_step))
+
+    # Initial conditions: (2,) vectors for a single planet, (K, 2) arrays for a batch
+    r0 = np.column_stack((initial_positions, np.zeros(len(bodies))))
+    v0 = np.column_stack((np.zeros(len(bodies)), -initial_velocities))
+    if 'bodies' not in config:
+        r0, v0 = r0[0], v0[0]
+
+    return planet_names, colors_at_perihelion, colors_at_aphelion, r0, v0, steps, time_step, \
+        method_integration, backend, streaming
+
+# Read config.json (or the config file given on the command line)
+config = read_json_config(sys.argv[1] if len(sys.argv) > 1 else "config.json")
+
+# Tolerances of the adaptive "RK45" method (optional)
+tolerances = {key: value for key, value in config['numerical_integration'].items() if key in ('rtol', 'atol')}
+
+# Plot settings (optional): point budget of the orbit lines and image file to write instead of displaying
+plot_settings = {key: value for key, value in config.get('plot', {}).items() if key in ('max_points', 'output')}
 
 # Constants
 G = 6.6743e-11    
 M_SUN = 1.989e30  # kg
 
-# Setup simulation
-planet_name, color_at_perihelion, color_at_aphelion, \
-      r, v, t, time_step, method_integration = setup_simulation(config)
+if 'streaming' in config:
+    # Setup simulation without storing every time step
+    planet_names, colors_at_perihelion, colors_at_aphelion, r0, v0, steps, \
+          time_step, method_integration, backend, streaming = setup_streaming_simulation(config)
+    decimation = streaming.get('decimation', 1)
+
+    # Integrate chunk by chunk, the apsides are found on the way
+    stream = stream_orbit(G, M_SUN, r0, v0, accn, time_step, steps, method_integration, backend,
+                          decimation=decimation, chunk_size=streaming.get('chunk_size', 8192), **tolerances)
+    if streaming.get('output'):
+        # Write the decimated samples to disk, the memory stays constant
+        events = write_orbit_stream(stream, streaming['output'])
+    else:
+        # Keep the decimated samples in memory for the plot
+        events, samples = [], []
+        for _, r_chunk, _, chunk_events in stream:
+            samples.append(r_chunk)
+            events.extend(chunk_events)
+
+    # Print every Perihelion and Aphelion
+    print(f"{'Planet':<10}{'Event':<12}{'Day':>10}{'Distance (million km)':>23}{'Speed (km/s)':>14}")
+    for event in events:
+        print(f"{planet_names[event['body']]:<10}{event['kind'].capitalize():<12}{event['time']/86400:>10.2f}"
+              f"{event['distance']/1e9:>23.1f}{event['speed']/1e3:>14.1f}")
+
+    if not streaming.get('output'):
+        # Plot the decimated orbits, marking the farthest Aphelion and closest Perihelion of every planet
+        r = np.concatenate(samples).reshape(-1, len(planet_names), 2)
+        apsides = {}
+        for kind, pick in (('aphelion', max), ('perihelion', min)):
+            picked = [pick((e for e in events if e['body'] == k and e['kind'] == kind),
+                           key=lambda e: e['distance'], default=None) for k in range(len(planet_names))]
+            apsides[f'arg_{kind}'] = [min(round(e['step'] / decimation), len(r) - 1) if e else 0 for e in picked]
+            apsides[f'pos_{kind}'] = [e['distance'] if e else np.nan for e in picked]
+            apsides[f'vel_{kind}'] = [e['speed'] if e else np.nan for e in picked]
+        if 'bodies' in config:
+            plot_batch_data(r, method_integration, apsides, planet_names, colors_at_perihelion, colors_at_aphelion,
+                            **plot_settings)
+        else:
+            plot_simulated_data(r[:, 0], method_integration, apsides['arg_aphelion'][0], apsides['vel_aphelion'][0],
+                                apsides['pos_aphelion'][0], planet_names[0], colors_at_perihelion[0],
+                                colors_at_aphelion[0], **plot_settings)
+elif 'bodies' in config:
+    # Setup simulation of all the planets at once
+    planet_names, colors_at_perihelion, colors_at_aphelion, \
+          r, v, t, time_step, method_integration, backend = setup_batch_simulation(config)
+
+    # Call numerical integration (vectorized across the planets)
+    stats = numerical_integration(G, M_SUN, r, v, accn, time_step, method=method_integration, backend=backend,
+                                  **tolerances)
+    print(f"{stats['steps']} steps ({stats['rejected']} rejected), {stats['evaluations']} evaluations of the acceleration")
+
+    # Get data of every planet at its Aphelion and Perihelion
+    apsides = at_apsides(r, v)
+    print(f"{'Planet':<10}{'Perihelion (million km)':>25}{'Aphelion (million km)':>23}{'Speed at Aphelion (km/s)':>26}")
+    for k, planet_name in enumerate(planet_names):
+        print(f"{planet_name:<10}{apsides['pos_perihelion'][k]/1e9:>25.1f}{apsides['pos_aphelion'][k]/1e9:>23.1f}"
+              f"{apsides['vel_aphelion'][k]/1e3:>26.1f}")
+
+    # Plot the simulated data
+    plot_batch_data(r, method_integration, apsides, planet_names, colors_at_perihelion, colors_at_aphelion,
+                    **plot_settings)
+else:
+    # Setup simulation
+    planet_name, color_at_perihelion, color_at_aphelion, \
+          r, v, t, time_step, method_integration, backend = setup_simulation(config)
 
-# Call numerical integration
-numerical_integration(G, M_SUN, r, v, accn, time_step, method=method_integration,)
+    # Call numerical integration
+    stats = numerical_integration(G, M_SUN, r, v, accn, time_step, method=method_integration, backend=backend,
+                                  **tolerances)
+    print(f"{stats['steps']} steps ({stats['rejected']} rejected), {stats['evaluations']} evaluations of the acceleration")
 
-# Get data of Earth at its Aphelion
-arg_aphelion, vel_aphelion, pos_aphelion = at_aphelion(r, v)
+    # Get data of Earth at its Aphelion
+    arg_aphelion, vel_aphelion, pos_aphelion = at_aphelion(r, v)
 
-# Plot the simulated data
-plot_simulated_data(r, method_integration, arg_aphelion, vel_aphelion, pos_aphelion, 
-                    planet_name, color_at_perihelion, color_at_aphelion)
+    # Plot the simulated data
+    plot_simulated_data(r, method_integration, arg_aphelion, vel_aphelion, pos_aphelion, 
+                        planet_name, color_at_perihelion, color_at_aphelion, **plot_settings)
@@ -1,5 +1,8 @@
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
+import math
 import json
 
 def read_json_config(file_path):
@@ -44,6 +47,24 @@ def accn(G, M_sun, r):
     """
     return (-G * M_sun / np.linalg.norm(r)**3) * r
 
+def accn_batch(G, M_sun, r):
+    """
+    Calculate the gravitational acceleration of many bodies due to the mass of the Sun.
+
+    Parameters:
+    - G (float): Universal Gravitational Constant.
+    - M_sun (float): Mass of the Sun in kilograms.
+    - r (numpy.ndarray): (K, 2) array of position vectors, one per body.
+
+    Returns:
+    - numpy.ndarray: (K, 2) array of acceleration vectors.
+
+    Formula:
+    - Same as accn for every body: a_k = (-G * M_sun / |r_k|^3) * r_k
+    """
+    distance = np.sqrt(r[..., 0]*r[..., 0] + r[..., 1]*r[..., 1])
+    return (-G * M_sun / distance**3)[..., np.newaxis] * r
+
 def euler_method(G, M_sun, r, v, accn, dt):
     """
     Perform numerical simulation using the Euler method for solving ordinary differential equations (ODEs).
@@ -143,9 +164,39 @@ def rk4_method(G, M_sun, r, v, accn, dt):
         v[i] = v[i-1] + dt/6*(k1v + 2*k2v + 2*k3v + k4v)
         r[i] = r[i-1] + dt/6*(k1r + 2*k2r + 2*k3r + k4r)
 
-def numerical_integration(G, M_sun, r, v, accn, dt, method):
+# Dormand-Prince 5(4) coefficients: nodes, stages, 5th order weights, error weights (5th - 4th order)
+# and the dense output polynomial of the 4th order continuous extension (as in Hairer & Wanner)
+DOPRI_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+DOPRI_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+DOPRI_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+DOPRI_E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+DOPRI_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+def rk45_method(G, M_sun, r, v, accn, dt, rtol=1e-9, atol=1e-6, state=None, final=True):
     """
-    Apply numerical integration to simulate the motion of a celestial body using the specified method.
+    Perform numerical simulation using the adaptive Dormand-Prince method (embedded Runge-Kutta 5(4)).
+
+    The internal step size is chosen to keep the local error estimate (difference between the 5th and
+    the 4th order solutions) within the tolerances: long steps where the orbit is slow (Aphelion),
+    short steps where it is fast (Perihelion). The last stage of an accepted step is the first stage
+    of the next one, so a step costs 6 evaluations of accn. The outputs at the fixed time steps
+    i*dt are filled in with the dense output polynomial of every accepted step, so dt only sets the
+    sampling of r and v and not the accuracy.
 
     Parameters:
     - G (float): Universal Gravitational Constant.
@@ -153,22 +204,260 @@ def numerical_integration(G, M_sun, r, v, accn, dt, method):
     - r (numpy.ndarray): Array representing the position vector at each time step.
     - v (numpy.ndarray): Array representing the velocity vector at each time step.
     - accn (function): Function to calculate acceleration at a given position.
+    - dt (float): Time between two stored time steps (also the first internal step).
+    - rtol (float): Relative tolerance of the local error. Default is 1e-9.
+    - atol (float): Absolute tolerance of the local error (in m and m/s). Default is 1e-6.
+    - state (dict): Integrator state to continue a run split into chunks (see stream_orbit). Pass an
+      empty dict for the first chunk; every call stores in it the state to resume the next chunk from.
+      Default is None (a single run).
+    - final (bool): Whether r and v end where the run ends (only used with state). The last step of
+      the run is shortened to end exactly there, the last step of any other chunk is not. Default is True.
+
+    Note:
+    - The provided arrays r and v should be initialized with the initial conditions of the simulation.
+    - With state, a chunk stops after the step that crosses its end, and the next chunk starts again
+      from the beginning of that step with the same step size. The chunks therefore take the same
+      steps as one long run (that step is computed and counted in both chunks).
+
+    Returns:
+    - dict: steps (accepted steps), rejected (rejected steps) and evaluations (calls of accn).
+    """
+    def derivative(y):
+        return np.stack((y[1], accn(G, M_sun, y[0])))
+
+    t_end = (len(r) - 1) * dt
+    final = final or state is None
+    y = np.stack((r[0], v[0]))
+    k = np.empty((7,) + y.shape)
+    t, h, i = 0.0, float(dt), 1
+    steps = rejected = 0
+    if state:
+        # Resume at the start of the last step of the previous chunk (t <= 0 in the time of this chunk)
+        t, y, k[0], h = state['t'], state['y'], state['k0'], state['h']
+        evaluations = 0
+    else:
+        k[0] = derivative(y)
+        evaluations = 1
+
+    while i < len(r):
+        last = final and h >= t_end - t
+        if last:
+            h = t_end - t
+        for stage in range(1, 6):
+            dy = np.tensordot(DOPRI_A[stage], k[:stage], axes=1)
+            k[stage] = derivative(y + h*dy)
+        y_new = y + h*np.tensordot(DOPRI_B, k[:6], axes=1)
+        k[6] = derivative(y_new)
+        evaluations += 6
+
+        # Root mean square of the error estimate, scaled by the tolerances
+        scale = atol + rtol*np.maximum(np.abs(y), np.abs(y_new))
+        error = np.sqrt(np.mean((h*np.tensordot(DOPRI_E, k, axes=1) / scale)**2))
+        factor = 0.9 * error**-0.2 if error > 0 else 10
+        if error > 1:
+            rejected += 1
+            h *= max(0.2, factor)
+            continue
+
+        # Dense output at the stored time steps inside [t, t + h]
+        t_new = t_end if last else t + h
+        stop = len(r) if last else min(len(r), int(t_new // dt) + 1)
+        if stop > i:
+            x = (np.arange(i, stop)*dt - t) / h
+            q = np.tensordot(DOPRI_P.T, k, axes=1)
+            y_out = y + h*np.tensordot(np.cumprod(np.repeat(x[:, np.newaxis], 4, axis=1), axis=1), q, axes=1)
+            r[i:stop], v[i:stop] = y_out[:, 0], y_out[:, 1]
+            i = stop
+            if i == len(r) and not final:
+                state.update(t=t - t_end, y=y, k0=k[0].copy(), h=h)
+                steps += 1
+                break
+
+        t, y, k[0] = t_new, y_new, k[6]
+        steps += 1
+        h *= min(10, factor)
+
+    return {'steps': steps, 'rejected': rejected, 'evaluations': evaluations}
+
+def _column_views(r, v):
+    """
+    Return writable views of the x and y columns of the position and velocity arrays.
+
+    Parameters:
+    - r (numpy.ndarray): (T, 2) array of positions.
+    - v (numpy.ndarray): (T, 2) array of velocities.
+
+    Returns:
+    Tuple[memoryview, memoryview, memoryview, memoryview]: Views of r[:, 0], r[:, 1], v[:, 0] and v[:, 1]
+    (item i is a Python float), or None if an array is not a writable float64 array.
+    """
+    for a in (r, v):
+        if a.dtype != np.float64 or not a.flags.writeable:
+            return None
+    return memoryview(r[:, 0]), memoryview(r[:, 1]), memoryview(v[:, 0]), memoryview(v[:, 1])
+
+def euler_method_fast(G, M_sun, r, v, dt):
+    """
+    Perform numerical simulation using the Euler method with scalar arithmetic (fast backend).
+
+    Same equations and the same order of floating point operations as euler_method with accn,
+    but every step works on Python floats and writes straight into the columns of r and v,
+    so there is no temporary array and no NumPy call per step.
+
+    Parameters:
+    - G (float): Universal Gravitational Constant.
+    - M_sun (float): Mass of the Sun in kilograms.
+    - r (numpy.ndarray): Array representing the position vector at each time step.
+    - v (numpy.ndarray): Array representing the velocity vector at each time step.
     - dt (float): Time step for the simulation.
-    - method (str): Integration method, either "euler" or "rk4".
+
+    Note:
+    - The provided arrays r and v should be initialized with the initial conditions of the simulation.
+    - The results differ from euler_method in the last bits (see the backend of numerical_integration).
+      On config.json r and v differ by up to 1e-15 relative, e.g. 1e-4 m in r after one year.
+    """
+    columns = _column_views(r, v)
+    if columns is None:
+        r_copy, v_copy = r.astype(float), v.astype(float)
+        euler_method_fast(G, M_sun, r_copy, v_copy, dt)
+        r[:], v[:] = r_copy, v_copy
+        return
+    rx, ry, vxs, vys = columns
+    sqrt = math.sqrt
+    gm = -G * M_sun
+    x, y, vx, vy = rx[0], ry[0], vxs[0], vys[0]
+
+    # For each time step, apply Euler Integration
+    for i in range(1, len(r)):
+        k = gm / sqrt(x*x + y*y)**3
+        x, y, vx, vy = x + vx*dt, y + vy*dt, vx + k*x*dt, vy + k*y*dt
+        rx[i], ry[i], vxs[i], vys[i] = x, y, vx, vy
+
+def rk4_method_fast(G, M_sun, r, v, dt):
+    """
+    Perform numerical simulation using the Runge-Kutta (4th Order) method with scalar arithmetic (fast backend).
+
+    Same equations and the same order of floating point operations as rk4_method with accn,
+    but every step works on Python floats and writes straight into the columns of r and v,
+    so there is no temporary array and no NumPy call per step.
+
+    Parameters:
+    - G (float): Universal Gravitational Constant.
+    - M_sun (float): Mass of the Sun in kilograms.
+    - r (numpy.ndarray): Array representing the position vector at each time step.
+    - v (numpy.ndarray): Array representing the velocity vector at each time step.
+    - dt (float): Time step for the simulation.
+
+    Note:
+    - The provided arrays r and v should be initialized with the initial conditions of the simulation.
+    - The results differ from rk4_method in the last bits (see the backend of numerical_integration).
+      On config.json r is identical after one year and v differs by up to 1.2e-16 relative.
+    """
+    columns = _column_views(r, v)
+    if columns is None:
+        r_copy, v_copy = r.astype(float), v.astype(float)
+        rk4_method_fast(G, M_sun, r_copy, v_copy, dt)
+        r[:], v[:] = r_copy, v_copy
+        return
+    rx, ry, vxs, vys = columns
+    sqrt = math.sqrt
+    gm = -G * M_sun
+    h = dt/6
+    x, y, vx, vy = rx[0], ry[0], vxs[0], vys[0]
+
+    # For each time step, apply Runge-Kutta (4th Order)
+    for i in range(1, len(r)):
+        # Step 1:- 0
+        k = gm / sqrt(x*x + y*y)**3
+        k1vx, k1vy = k*x, k*y
+        k1rx, k1ry = vx, vy
+
+        # Step 2:- dt/2 using step 1
+        px, py = x + k1rx*dt/2, y + k1ry*dt/2
+        k = gm / sqrt(px*px + py*py)**3
+        k2vx, k2vy = k*px, k*py
+        k2rx, k2ry = vx + k1vx*dt/2, vy + k1vy*dt/2
+
+        # Step 3:- dt/2 using step 2
+        px, py = x + k2rx*dt/2, y + k2ry*dt/2
+        k = gm / sqrt(px*px + py*py)**3
+        k3vx, k3vy = k*px, k*py
+        k3rx, k3ry = vx + k2vx*dt/2, vy + k2vy*dt/2
+
+        # Step 4:- dt using step 3
+        px, py = x + k3rx*dt, y + k3ry*dt
+        k = gm / sqrt(px*px + py*py)**3
+        k4vx, k4vy = k*px, k*py
+        k4rx, k4ry = vx + k3vx*dt, vy + k3vy*dt
+
+        # Get the Velocity and Position Vectors for a given Time Step
+        vx, vy = vx + h*(k1vx + 2*k2vx + 2*k3vx + k4vx), vy + h*(k1vy + 2*k2vy + 2*k3vy + k4vy)
+        x, y = x + h*(k1rx + 2*k2rx + 2*k3rx + k4rx), y + h*(k1ry + 2*k2ry + 2*k3ry + k4ry)
+        rx[i], ry[i], vxs[i], vys[i] = x, y, vx, vy
+
+def numerical_integration(G, M_sun, r, v, accn, dt, method, backend='fast', rtol=1e-9, atol=1e-6, state=None,
+                          final=True):
+    """
+    Apply numerical integration to simulate the motion of a celestial body using the specified method.
+
+    Parameters:
+    - G (float): Universal Gravitational Constant.
+    - M_sun (float): Mass of the Sun in kilograms.
+    - r (numpy.ndarray): Array representing the position vector at each time step, either (T, 2) for one
+      body or (T, K, 2) for a batch of K bodies integrated together.
+    - v (numpy.ndarray): Array representing the velocity vector at each time step (same shape as r).
+    - accn (function): Function to calculate acceleration at a given position (for a batch it gets (K, 2)
+      positions, and accn itself is replaced by accn_batch).
+    - dt (float): Time step for the simulation (for "rk45", the time between two stored time steps).
+    - method (str): Integration method, either "euler", "rk4" or "rk45" (adaptive Dormand-Prince).
+    - backend (str): Either "fast" (scalar kernels, used only when accn is the Newtonian accn of
+      this module) or "numpy" (the reference kernels calling accn every step). Default is "fast".
+      The fast kernels are not bit-identical to the reference: accn takes |r| from np.linalg.norm,
+      which may round with a fused multiply-add (depending on the BLAS build), and the last-bit
+      differences add up over a run. Positions and velocities agree within 1e-12 relative to |r|
+      and |v|, so the default output differs from "numpy" by up to that much.
+      A batch is always integrated with the NumPy kernels, vectorized across the K bodies.
+      "rk45" always uses the NumPy kernels.
+    - rtol (float): Relative tolerance of "rk45". Default is 1e-9.
+    - atol (float): Absolute tolerance of "rk45" (in m and m/s). Default is 1e-6.
+    - state (dict), final (bool): Continue a "rk45" run split into chunks (see rk45_method).
+      Default is None and True (a single run).
 
     Raises:
-    - Exception: If the provided method is neither "euler" nor "rk4".
+    - Exception: If the provided method is not "euler", "rk4" or "rk45", or the backend is neither "fast" nor "numpy".
 
     Returns:
-    - None: Updates the provided position (r) and velocity (v) arrays in-place.
+    - dict: steps (accepted steps), rejected (rejected steps) and evaluations (calls of accn).
+      Updates the provided position (r) and velocity (v) arrays in-place.
     """
 
+    if backend.lower() not in ('fast', 'numpy'):
+        raise Exception(f'Invalid backend. Choose either "fast" or "numpy". Provided backend: {backend}')
+    newtonian = accn is globals()['accn']
+    if r.ndim == 3:
+        # Every step works on the (K, 2) positions of all the bodies at once
+        accn = accn_batch if newtonian else accn
+        newtonian = False
+    # The fast kernels have the Newtonian acceleration built in
+    fast = backend.lower() == 'fast' and newtonian
+
+    steps = len(r) - 1
     if method.lower() == 'euler':
-        euler_method(G, M_sun, r, v, accn, dt)
+        if fast:
+            euler_method_fast(G, M_sun, r, v, dt)
+        else:
+            euler_method(G, M_sun, r, v, accn, dt)
+        return {'steps': steps, 'rejected': 0, 'evaluations': steps}
     elif method.lower() == 'rk4':
-        rk4_method(G, M_sun, r, v, accn, dt)
+        if fast:
+            rk4_method_fast(G, M_sun, r, v, dt)
+        else:
+            rk4_method(G, M_sun, r, v, accn, dt)
+        return {'steps': steps, 'rejected': 0, 'evaluations': 4*steps}
+    elif method.lower() == 'rk45':
+        return rk45_method(G, M_sun, r, v, accn, dt, rtol, atol, state, final)
     else:
-        raise Exception(f'Invalid method. Choose either "euler" or "rk4". Provided method: {method}')
+        raise Exception(f'Invalid method. Choose either "euler", "rk4" or "rk45". Provided method: {method}')
 
 def at_aphelion(r, v):
     """
@@ -191,8 +480,227 @@ def at_aphelion(r, v):
     vel_aphelion = np.linalg.norm(v[arg_aphelion])
     return arg_aphelion, vel_aphelion, pos_aphelion
 
+def at_apsides(r, v):
+    """
+    Determine the Aphelion and Perihelion of every body of a batch from simulated data.
+
+    Parameters:
+    - r (numpy.ndarray): (T, K, 2) simulated data array for the positions of the bodies.
+    - v (numpy.ndarray): (T, K, 2) simulated data array for the velocities of the bodies.
+
+    Returns:
+    - dict: (K,) arrays for every body:
+        - arg_aphelion, vel_aphelion, pos_aphelion: Index, speed and distance at the Aphelion.
+        - arg_perihelion, vel_perihelion, pos_perihelion: Index, speed and distance at the Perihelion.
+    """
+    sizes = np.hypot(r[..., 0], r[..., 1])
+    speeds = np.hypot(v[..., 0], v[..., 1])
+    bodies = np.arange(r.shape[1])
+    arg_aphelion, arg_perihelion = np.argmax(sizes, axis=0), np.argmin(sizes, axis=0)
+    return {
+        'arg_aphelion': arg_aphelion,
+        'vel_aphelion': speeds[arg_aphelion, bodies],
+        'pos_aphelion': sizes[arg_aphelion, bodies],
+        'arg_perihelion': arg_perihelion,
+        'vel_perihelion': speeds[arg_perihelion, bodies],
+        'pos_perihelion': sizes[arg_perihelion, bodies],
+    }
+
+def _apsis_events(distances, speeds, first_step, dt):
+    """
+    Find the Perihelion and Aphelion events in a run of consecutive distances.
+
+    Parameters:
+    - distances (numpy.ndarray): (n + 2, K) distances from the Sun, the first and last rows being the
+      neighbours of the candidate steps first_step .. first_step + n - 1.
+    - speeds (numpy.ndarray): (n, K) speeds at the candidate steps.
+    - first_step (int): Index of the time step of the first candidate.
+    - dt (float): Time step for the simulation.
+
+    Returns:
+    - list: One dict per event (kind, body, step, time, distance, speed), in the order of the steps.
+    """
+    before, here, after = distances[:-2], distances[1:-1], distances[2:]
+    kinds = np.where((here > before) & (here >= after), 1, np.where((here < before) & (here <= after), -1, 0))
+    events = []
+    for row, body in zip(*np.nonzero(kinds)):
+        step = first_step + int(row)
+        events.append({'kind': 'aphelion' if kinds[row, body] > 0 else 'perihelion', 'body': int(body),
+                       'step': step, 'time': step*dt, 'distance': float(here[row, body]),
+                       'speed': float(speeds[row, body])})
+    return events
+
+def stream_orbit(G, M_sun, r0, v0, accn, dt, steps, method, backend='fast', decimation=1, chunk_size=8192,
+                 rtol=1e-9, atol=1e-6):
+    """
+    Simulate an orbit in chunks of constant memory, yielding decimated samples and apsis events.
+
+    Only two buffers of chunk_size + 1 rows are allocated and reused for the whole run, so the memory
+    does not depend on the number of steps. Each chunk is integrated by numerical_integration starting
+    from the last state of the previous chunk, which gives the same trajectory as one long run (for
+    "rk45" the adaptive step is carried across the chunks too, so the chunks take the same steps as
+    one long run and the samples only differ by the rounding of the times).
+    Every Perihelion (local minimum of the distance) and Aphelion (local maximum) is detected while
+    integrating, one step late at most, instead of searching the whole trajectory afterwards.
+
+    Parameters:
+    - G (float): Universal Gravitational Constant.
+    - M_sun (float): Mass of the Sun in kilograms.
+    - r0 (numpy.ndarray): Initial position, (2,) for one body or (K, 2) for a batch of bodies.
+    - v0 (numpy.ndarray): Initial velocity (same shape as r0).
+    - accn (function): Function to calculate acceleration at a given position.
+    - dt (float): Time step for the simulation.
+    - steps (int): Number of time steps, including the initial conditions.
+    - method (str): Integration method, either "euler", "rk4" or "rk45".
+    - backend (str): Either "fast" or "numpy" (see numerical_integration). Default is "fast".
+    - decimation (int): Only every decimation-th time step is yielded. Default is 1 (every step).
+    - chunk_size (int): Number of time steps integrated between two yields. Default is 8192.
+    - rtol, atol (float): Tolerances of "rk45" (see numerical_integration).
+
+    Raises:
+    - Exception: If decimation or chunk_size is not a positive integer.
+
+    Yields:
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, list]: For every chunk:
+        - t (numpy.ndarray): Times of the yielded samples in seconds.
+        - r (numpy.ndarray): Positions of the yielded samples (a copy, shape (n,) + r0.shape).
+        - v (numpy.ndarray): Velocities of the yielded samples (same shape as r).
+        - events (list): Apsis events found so far that were not yielded yet, as dicts with
+          kind ("perihelion" or "aphelion"), body (index in the batch, 0 for one body), step,
+          time (in seconds), distance (in metres) and speed (in m/s).
+    """
+    if int(decimation) != decimation or decimation < 1 or int(chunk_size) != chunk_size or chunk_size < 1:
+        raise Exception(f'Invalid streaming settings. Use positive integers. '
+                        f'Provided decimation: {decimation}, chunk_size: {chunk_size}')
+    r0, v0 = np.asarray(r0, dtype=float), np.asarray(v0, dtype=float)
+    r = np.empty((chunk_size + 1,) + r0.shape)
+    v = np.empty((chunk_size + 1,) + v0.shape)
+    r[0], v[0] = r0, v0
+
+    def norms(a):
+        return np.hypot(a[..., 0], a[..., 1]).reshape(len(a), -1)
+
+    # The initial state is yielded alone, its "previous" distance mirrors the next one, so that
+    # it is a Perihelion (or an Aphelion) when the body starts moving away from (or towards) the Sun
+    first = 0
+    previous = None
+    done = 1
+    # State of the adaptive "rk45" steps between the chunks
+    state = {} if method.lower() == 'rk45' else None
+    yield np.zeros(1), r[:1].copy(), v[:1].copy(), []
+    while done < steps:
+        n = min(chunk_size, steps - done)
+        numerical_integration(G, M_sun, r[:n + 1], v[:n + 1], accn, dt, method, backend, rtol, atol,
+                              state, final=done + n == steps)
+        # Row j of the buffers is the time step first + j, rows 0..n-1 have both neighbours now
+        distances = norms(r[:n + 1])
+        if previous is None:
+            previous = distances[1:2]
+        candidates = np.vstack((previous, distances))
+        events = _apsis_events(candidates, norms(v[:n]), first, dt)
+        previous, first = distances[n - 1:n], done + n - 1
+
+        step = np.arange(done, done + n)
+        keep = step % decimation == 0
+        yield step[keep]*dt, r[1:n + 1][keep], v[1:n + 1][keep], events
+        r[0], v[0] = r[n], v[n]
+        done += n
+
+def write_orbit_stream(stream, path):
+    """
+    Write the samples of stream_orbit to a CSV file chunk by chunk.
+
+    Parameters:
+    - stream (generator): Generator returned by stream_orbit.
+    - path (str): Path of the CSV file (columns: time, then x, y, vx, vy of every body, in SI units).
+
+    Returns:
+    - list: Every apsis event of the run (see stream_orbit).
+    """
+    events = []
+    with open(path, 'w') as file:
+        header = None
+        for t, r, v, chunk_events in stream:
+            events.extend(chunk_events)
+            if header is None:
+                bodies = r[0].size // 2
+                header = ['time'] + [f'{name}{k}' for k in range(bodies) for name in ('x', 'y', 'vx', 'vy')]
+                file.write(','.join(header) + '\n')
+            rows = np.concatenate((r, v), axis=-1).reshape(len(t), -1)
+            np.savetxt(file, np.column_stack((t, rows)), delimiter=',', fmt='%.17g')
+    return events
+
+def lttb_indices(points, max_points):
+    """
+    Select the points of a path that preserve its shape (Largest-Triangle-Three-Buckets).
+
+    The points between the first and the last one are split into max_points - 2 buckets of
+    consecutive points. Every bucket keeps the point forming the largest triangle with the point
+    kept in the previous bucket and the mean of the next bucket, so sharp turns are kept and
+    straight or nearly straight runs are thinned out. The triangle areas use both coordinates,
+    so it works for closed paths like orbits and not only for time series.
+
+    Parameters:
+    - points (numpy.ndarray): (T, 2) array of points in path order.
+    - max_points (int): Maximum number of points to keep (None or less than 3 keeps every point).
+
+    Returns:
+    - numpy.ndarray: Sorted indices of the kept points (always including the first and the last one).
+    """
+    n = len(points)
+    if max_points is None or max_points < 3 or n <= max_points:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    means = np.add.reduceat(points[:-1], edges[:-1]) / np.diff(edges)[:, np.newaxis]
+    means = np.vstack((means, points[-1:]))
+
+    kept = np.empty(max_points, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    ax, ay = points[0]
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        x, y = points[start:stop, 0], points[start:stop, 1]
+        nx, ny = means[bucket + 1]
+        # Twice the area of the triangle (previous kept point, candidate, mean of the next bucket)
+        areas = np.abs((ax - nx)*(y - ay) - (ax - x)*(ny - ay))
+        kept[bucket + 1] = start + np.argmax(areas)
+        ax, ay = points[kept[bucket + 1]]
+    return kept
+
+def _new_figure(figsize, output):
+    """
+    Create the figure of a plot.
+
+    Parameters:
+    - figsize (tuple): Width and height of the figure in inches.
+    - output (str): Path of the image file, None to display the figure.
+
+    Returns:
+    - matplotlib.figure.Figure: A pyplot figure to display, or a figure drawn by its own Agg canvas
+      (not managed by pyplot, so the backend of the process is left unchanged) to write to a file.
+    """
+    if output is None:
+        return plt.figure(figsize=figsize)
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+def _show_or_save(figure, output):
+    """
+    Display a figure, or write it to an image file.
+
+    Parameters:
+    - figure (matplotlib.figure.Figure): Figure created by _new_figure.
+    - output (str): Path of the image file (e.g. "orbit.png"), None to display the figure.
+    """
+    if output is None:
+        plt.show()
+    else:
+        figure.savefig(output, dpi=100)
+
 def plot_simulated_data(r, method_integration, arg_aphelion,
-                        vel_aphelion, pos_aphelion, name_planet, color_peri, color_ap):
+                        vel_aphelion, pos_aphelion, name_planet, color_peri, color_ap,
+                        max_points=2000, output=None):
     """
     Generate a 3D plot from simulated data representing the orbit of a planet.
 
@@ -205,33 +713,78 @@ def plot_simulated_data(r, method_integration, arg_aphelion,
     - name_planet (str): The name of the Planet.
     - color_peri (str): The color of the marker at Perihelion.
     - color_ap (str): The color of the marker at Aphelion.
+    - max_points (int): Maximum number of points of the orbit line, selected by lttb_indices
+      (None to draw every point). Default is 2000.
+    - output (str): Image file to write the figure to without displaying it (e.g. "orbit.png").
+      Default is None (display the figure).
     """
 
-    # Setup the Figure and Axis for the Subplot
-    plt.style.use('dark_background')
-    plt.figure(figsize=(7, 12))
-    plt.subplot(projection='3d')
-
-    # Add Suptitle
-    suptitle_str = 'RK4' if method_integration.lower() == 'rk4' else 'Euler'
-    plt.suptitle(suptitle_str + ' Method', color='r', fontsize=18, weight='bold')
-
-    # Add Title
-    title_str = f'At Aphelion, the {name_planet} is {round(pos_aphelion/1e9, 1)} million km away from the Sun\nMoving at the speed of {round(vel_aphelion/1e3, 1)} km/s.'
-    plt.title(title_str, fontsize=14, color='orange')
-
-    # Plot the Orbit, Sun, Earth at Perihelion and Aphelion
-    plt.plot(r[:, 0], r[:, 1], color='tab:pink', lw=2, label='Orbit')
-    plt.scatter(0, 0, color='yellow', s=1000, label='Sun')
-    plt.scatter(r[0,0], r[0,1], s=200, label=f'{name_planet} at its Perihelion', color=color_peri)
-    plt.scatter(r[arg_aphelion,0], r[arg_aphelion,1], s=200,
-                label=f'{name_planet} at its Aphelion', color=color_ap)
+    # Setup the Figure and Axis for the Subplot (drawn by its own canvas when writing to a file)
+    with plt.style.context('dark_background'):
+        figure = _new_figure((7, 12), output)
+        ax = figure.add_subplot(projection='3d')
+
+        # Add Suptitle
+        suptitle_str = {'rk4': 'RK4', 'rk45': 'RK45 (Dormand-Prince)'}.get(method_integration.lower(), 'Euler')
+        figure.suptitle(suptitle_str + ' Method', color='r', fontsize=18, weight='bold')
+
+        # Add Title
+        title_str = f'At Aphelion, the {name_planet} is {round(pos_aphelion/1e9, 1)} million km away from the Sun\nMoving at the speed of {round(vel_aphelion/1e3, 1)} km/s.'
+        ax.set_title(title_str, fontsize=14, color='orange')
+
+        # Plot the Orbit (downsampled), Sun, Earth at Perihelion and Aphelion
+        orbit = r[lttb_indices(r, max_points)]
+        ax.plot(orbit[:, 0], orbit[:, 1], color='tab:pink', lw=2, label='Orbit')
+        ax.scatter(0, 0, color='yellow', s=1000, label='Sun')
+        ax.scatter(r[0,0], r[0,1], s=200, label=f'{name_planet} at its Perihelion', color=color_peri)
+        ax.scatter(r[arg_aphelion,0], r[arg_aphelion,1], s=200,
+                   label=f'{name_planet} at its Aphelion', color=color_ap)
+
+        # Add Legend and Customize it
+        legend = ax.legend(loc='lower right', frameon=False)
+        for i in range(1, 4):
+            legend.legend_handles[i]._sizes = [150] if i == 1 else [80]
+
+        # Turn off the axis and Display (or save) the result
+        ax.axis('off')
+        _show_or_save(figure, output)
+
+def plot_batch_data(r, method_integration, apsides, names, colors_peri, colors_ap, max_points=2000, output=None):
+    """
+    Generate a 3D plot from simulated data representing the orbits of a batch of planets.
 
-    # Add Legend and Customize it
-    legend = plt.legend(loc='lower right', frameon=False)
-    for i in range(1, 4):
-        legend.legend_handles[i]._sizes = [150] if i == 1 else [80]
+    Parameters:
+    - r (numpy.ndarray): (T, K, 2) simulated data for the positions of the planets.
+    - method_integration (str): The numerical integration method used ("euler" or "rk4").
+    - apsides (dict): Aphelion and Perihelion of every planet (returned by at_apsides).
+    - names (list): The names of the Planets.
+    - colors_peri (list): The colors of the markers at Perihelion.
+    - colors_ap (list): The colors of the markers at Aphelion.
+    - max_points (int): Maximum number of points of every orbit line (see plot_simulated_data). Default is 2000.
+    - output (str): Image file to write the figure to without displaying it. Default is None (display the figure).
+    """
 
-    # Turn off the axis and Display the result
-    plt.axis('off')
-    plt.show()
+    # Setup the Figure and Axis for the Subplot (drawn by its own canvas when writing to a file)
+    with plt.style.context('dark_background'):
+        figure = _new_figure((10, 10), output)
+        ax = figure.add_subplot(projection='3d')
+
+        # Add Suptitle
+        suptitle_str = {'rk4': 'RK4', 'rk45': 'RK45 (Dormand-Prince)'}.get(method_integration.lower(), 'Euler')
+        figure.suptitle(suptitle_str + ' Method', color='r', fontsize=18, weight='bold')
+
+        # Plot the Sun, then the Orbit of every Planet with its Perihelion and Aphelion
+        ax.scatter(0, 0, color='yellow', s=1000, label='Sun')
+        for k, name in enumerate(names):
+            arg_perihelion, arg_aphelion = apsides['arg_perihelion'][k], apsides['arg_aphelion'][k]
+            orbit = r[lttb_indices(r[:, k], max_points), k]
+            ax.plot(orbit[:, 0], orbit[:, 1], lw=1.5, label=f'{name} '
+                    f'({round(apsides["pos_perihelion"][k]/1e9, 1)} - {round(apsides["pos_aphelion"][k]/1e9, 1)} million km)')
+            ax.scatter(r[arg_perihelion, k, 0], r[arg_perihelion, k, 1], s=60, color=colors_peri[k])
+            ax.scatter(r[arg_aphelion, k, 0], r[arg_aphelion, k, 1], s=60, color=colors_ap[k])
+
+        # Add Legend, turn off the axis and Display (or save) the result
+        legend = ax.legend(loc='lower right', frameon=False)
+        legend.legend_handles[0]._sizes = [150]
+        ax.axis('off')
+        _show_or_save(figure, output)
@@ -0,0 +1,215 @@
+from time import perf_counter
+import numpy as np
+
+"""
+Barnes-Hut quadtree gravity solver.
+
+The quadtree is built level by level from the Morton (Z-order) keys of the bodies,
+so that every node is a contiguous run of the sorted bodies and its mass and
+center of mass can be computed with a single `np.add.reduceat`. The tree walk is
+vectorized over all the target positions at once: every (target, node) pair is
+either accepted as a point mass or opened into its children, until no pair is left.
+
+A node is accepted when the target lies outside of it and size/distance < theta.
+Smaller values of theta are more accurate and slower (theta = 0 is the direct sum).
+
+Accuracy (relative error of the accelerations against the direct sum, 3000 bodies):
+
+    theta   median    99th percentile   maximum    scene
+    0.5     0.9%      11%               70-100%    uniform cloud of comparable masses
+    0.3     0.25%     2.8%              15%        uniform cloud of comparable masses
+    0.3     2e-7      7e-7              3%         Sun, planets and minor bodies (benchmark.py)
+
+The largest errors belong to bodies whose pulls nearly cancel, so a small absolute error is
+large relative to their net acceleration. The error hardly grows with the number of bodies.
+
+Speed: at theta = 0.3 one evaluation of all the accelerations takes as long as the blocked
+direct sum at about 2000 bodies, is 1.5x faster at 3000 and 3x faster at 10k bodies. Below
+NBodySystem.min_tree_bodies bodies with mass the "barnes_hut" solver therefore sums directly.
+"""
+
+MAX_DEPTH = 20        # Deepest level of the tree (bodies closer than size/2^20 share a leaf)
+CHUNK_SIZE = 4096     # Number of targets walked through the tree at once
+
+def _morton_keys(cells, depth):
+    """
+    Interleave the bits of integer cell coordinates into Morton (Z-order) keys.
+
+    Parameters:
+    - cells (numpy.ndarray): (N, 2) array of integer cell coordinates in [0, 2^depth).
+    - depth (int): Number of bits per coordinate.
+
+    Returns:
+    - numpy.ndarray: (N,) array of Morton keys.
+    """
+    keys = np.zeros(len(cells), dtype=np.int64)
+    x = cells[:, 0].astype(np.int64)
+    y = cells[:, 1].astype(np.int64)
+    for bit in range(depth):
+        keys |= ((x >> bit) & 1) << (2*bit)
+        keys |= ((y >> bit) & 1) << (2*bit + 1)
+    return keys
+
+def build_tree(pos, mass, max_depth=MAX_DEPTH):
+    """
+    Build a quadtree over the bodies with non-zero mass.
+
+    Parameters:
+    - pos (numpy.ndarray): (N, 2) array of positions.
+    - mass (numpy.ndarray): (N,) array of masses (massless bodies are left out of the tree).
+    - max_depth (int): Deepest level of the tree.
+
+    Returns:
+    - dict: Flat arrays describing the nodes of the tree:
+        - mass, com, size, lower (bounding box corner), leaf, child_first, child_last.
+    """
+    sources = mass > 0
+    pos, mass = pos[sources], mass[sources]
+    if len(mass) == 0:
+        return None
+
+    # Bounding square of all the sources, slightly enlarged so every body falls inside
+    lower = pos.min(axis=0)
+    root_size = (pos.max(axis=0) - lower).max() * (1 + 1e-9) or 1.0
+    cells = np.minimum(((pos - lower) / root_size * (1 << max_depth)).astype(np.int64),
+                       (1 << max_depth) - 1)
+    keys = _morton_keys(cells, max_depth)
+    order = np.argsort(keys, kind='stable')
+    keys, pos, mass, cells = keys[order], pos[order], mass[order], cells[order]
+    weighted_pos = pos * mass[:, np.newaxis]
+
+    levels = []
+    for level in range(max_depth + 1):
+        shift = 2*(max_depth - level)
+        prefix = keys >> shift
+        starts = np.flatnonzero(np.r_[True, prefix[1:] != prefix[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        node_mass = np.add.reduceat(mass, starts)
+        node_com = np.add.reduceat(weighted_pos, starts) / node_mass[:, np.newaxis]
+        # Single bodies keep their exact position, so that a body always recognizes itself
+        single = counts == 1
+        node_com[single] = pos[starts[single]]
+        size = root_size / (1 << level)
+        node_cells = cells[starts] >> (max_depth - level)
+        levels.append((starts, counts, node_mass, node_com, size, lower + node_cells*size))
+        if counts.max() == 1:
+            break
+
+    # Flatten the levels into one node array and link every node to its children
+    offsets = np.cumsum([0] + [len(level[0]) for level in levels])
+    child_first, child_last = [], []
+    for depth, (starts, counts, *_) in enumerate(levels):
+        if depth + 1 < len(levels):
+            next_starts = levels[depth + 1][0]
+            child_first.append(np.searchsorted(next_starts, starts) + offsets[depth + 1])
+            child_last.append(np.searchsorted(next_starts, starts + counts) + offsets[depth + 1])
+        else:
+            child_first.append(np.zeros(len(starts), dtype=np.int64))
+            child_last.append(np.zeros(len(starts), dtype=np.int64))
+
+    counts = np.concatenate([level[1] for level in levels])
+    leaf = counts == 1
+    leaf[offsets[-2]:] = True
+    return {
+        'mass': np.concatenate([level[2] for level in levels]),
+        'com': np.concatenate([level[3] for level in levels]),
+        'size': np.concatenate([np.full(len(level[0]), level[4]) for level in levels]),
+        'lower': np.concatenate([level[5] for level in levels]),
+        'leaf': leaf,
+        'child_first': np.concatenate(child_first),
+        'child_last': np.concatenate(child_last),
+    }
+
+def _walk(tree, targets, theta):
+    """
+    Sum the accelerations (without the factor G) on the targets by walking the tree.
+
+    Parameters:
+    - tree (dict): Quadtree returned by build_tree.
+    - targets (numpy.ndarray): (M, 2) array of positions to evaluate at.
+    - theta (float): Opening angle.
+
+    Returns:
+    - numpy.ndarray: (M, 2) array of accelerations divided by G.
+    """
+    acc = np.zeros_like(targets)
+    target = np.arange(len(targets))
+    node = np.zeros(len(targets), dtype=np.int64)
+    theta_sq = theta**2
+    while len(target):
+        diff = tree['com'][node] - targets[target]
+        dist_sq = np.einsum('ij,ij->i', diff, diff)
+        size = tree['size'][node]
+        offset = targets[target] - tree['lower'][node]
+        inside = np.all((offset >= 0) & (offset < size[:, np.newaxis]), axis=1)
+        accept = tree['leaf'][node] | (~inside & (size**2 < theta_sq*dist_sq))
+
+        # Accepted nodes act as point masses (a body never attracts itself)
+        use = accept & (dist_sq > 0)
+        weight = tree['mass'][node[use]] / (dist_sq[use] * np.sqrt(dist_sq[use]))
+        for axis in range(2):
+            acc[:, axis] += np.bincount(target[use], weights=weight*diff[use, axis], minlength=len(targets))
+
+        # Opened nodes are replaced by their children
+        target, node = target[~accept], node[~accept]
+        first = tree['child_first'][node]
+        counts = tree['child_last'][node] - first
+        target = np.repeat(target, counts)
+        node = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    return acc
+
+def barnes_hut_accelerations(pos, mass, theta, G, targets=None):
+    """
+    Calculate the gravitational accelerations using the Barnes-Hut approximation.
+
+    Parameters:
+    - pos (numpy.ndarray): (N, 2) array of positions of the bodies.
+    - mass (numpy.ndarray): (N,) array of masses of the bodies.
+    - theta (float): Opening angle.
+    - G (float): Gravitational constant.
+    - targets (numpy.ndarray): (M, 2) positions to evaluate at (default is pos).
+
+    Returns:
+    - numpy.ndarray: (M, 2) array of accelerations in m/s^2.
+    """
+    targets = pos if targets is None else targets
+    acc = np.zeros_like(targets, dtype=float)
+    tree = build_tree(pos, mass)
+    if tree is None:
+        return acc
+    for start in range(0, len(targets), CHUNK_SIZE):
+        acc[start:start + CHUNK_SIZE] = _walk(tree, targets[start:start + CHUNK_SIZE], theta)
+    return G * acc
+
+def barnes_hut_accuracy(system, theta):
+    """
+    Compare the Barnes-Hut accelerations with the direct-sum result.
+
+    Parameters:
+    - system (NBodySystem): System of bodies to compare on.
+    - theta (float): Opening angle.
+
+    Returns:
+    - dict: Relative error statistics of the accelerations (median, 99th percentile and maximum)
+      and the time taken by each solver in seconds.
+    """
+    start = perf_counter()
+    direct = system.direct_accelerations()
+    direct_time = perf_counter() - start
+
+    start = perf_counter()
+    tree = barnes_hut_accelerations(system.pos, system.mass, theta, system.G)
+    tree_time = perf_counter() - start
+
+    norm = np.linalg.norm(direct, axis=1)
+    valid = norm > 0
+    error = np.linalg.norm(tree - direct, axis=1)[valid] / norm[valid]
+    return {
+        'theta': theta,
+        'bodies': system.size,
+        'median_rel_error': float(np.median(error)) if error.size else 0.0,
+        'p99_rel_error': float(np.percentile(error, 99)) if error.size else 0.0,
+        'max_rel_error': float(error.max()) if error.size else 0.0,
+        'direct_time': direct_time,
+        'tree_time': tree_time,
+    }
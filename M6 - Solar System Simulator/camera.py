@@ -0,0 +1,235 @@
+import numpy as np
+import pygame as pg
+from parameters import ZOOM_STEP, MIN_ZOOM, MAX_ZOOM, PAN_STEP, LOD_PIXEL_RADIUS
+
+# Class Info
+"""
+Interactive camera mapping simulation coordinates (metres) to window pixels.
+
+The camera looks at `center` with `scale` pixels per metre. Zoom 1 is the view of
+SIMULATION_SCALE centered on the origin, which is the fixed view of the simulator
+without a camera. Everything outside of the viewport is culled before it is drawn,
+so the drawing cost depends on what is visible and not on the number of bodies.
+
+Controls (see handle_event):
+- Mouse wheel or '+'/'-': Zoom in/out (the mouse wheel keeps the point under the cursor fixed).
+- Left mouse drag or 'W'/'A'/'S'/'D': Pan.
+- 'C': Reset the view.
+
+Attributes:
+- width (int): Width of the viewport in pixels.
+- height (int): Height of the viewport in pixels.
+- base_scale (float): Pixels per metre at zoom 1.
+- scale (float): Current pixels per metre.
+- center (numpy.ndarray): Simulation coordinates (metres) at the middle of the viewport.
+- zoom (float): Current magnification (scale / base_scale).
+- version (int): Incremented every time the view changes.
+
+Methods:
+- to_screen: Converts simulation coordinates to window pixels.
+- visible: Tests which screen points (with a radius) overlap the viewport.
+- visible_runs: Splits a polyline into the runs that cross the viewport.
+- visible_bodies: Returns the bodies that overlap the viewport.
+- draw_radius: Returns the on-screen radius of a body (0 for single-pixel bodies).
+- zoom_by: Zooms by a factor around a screen point.
+- pan: Moves the view by a number of pixels.
+- reset: Restores the initial view.
+- handle_event: Applies the zoom/pan controls of a Pygame event.
+"""
+
+class Camera:
+
+    def __init__(self, width, height, scale):
+        """
+        Initialize a camera centered on the origin at zoom 1.
+
+        Parameters:
+        - width (int): Width of the viewport in pixels.
+        - height (int): Height of the viewport in pixels.
+        - scale (float): Pixels per metre at zoom 1.
+
+        Returns:
+        None
+        """
+        self.width = width
+        self.height = height
+        self.base_scale = scale
+        self.version = 0
+        self._dragging = False
+        self._body_arrays = (None, None, None)   # (bodies, indices, radii) of the last visible_bodies call
+        self.reset()
+
+    @property
+    def zoom(self):
+        return self.scale / self.base_scale
+
+    def _changed(self):
+        self.version += 1
+
+    def to_screen(self, points):
+        """
+        Convert simulation coordinates to window pixels.
+
+        Parameters:
+        - points (numpy.ndarray): (N, 2) array (or a single (2,) point) of coordinates in metres.
+
+        Returns:
+        - numpy.ndarray: Pixel coordinates with the same shape as points.
+        """
+        return (points - self.center) * self.scale + (self.width//2, self.height//2)
+
+    def visible(self, screen_points, radius=0):
+        """
+        Test which screen points overlap the viewport.
+
+        Parameters:
+        - screen_points (numpy.ndarray): (N, 2) array of pixel coordinates.
+        - radius (float or numpy.ndarray): Radius (in pixels) around every point (default is 0).
+
+        Returns:
+        - numpy.ndarray: (N,) boolean mask of the visible points.
+        """
+        x, y = screen_points[:, 0], screen_points[:, 1]
+        return (x + radius >= 0) & (x - radius < self.width) & (y + radius >= 0) & (y - radius < self.height)
+
+    def visible_runs(self, points, line_width=2):
+        """
+        Split a polyline into the runs of segments that have an end inside the viewport.
+
+        Parameters:
+        - points (numpy.ndarray): (N, 2) array of simulation coordinates in metres.
+        - line_width (int): Width of the line in pixels (added as a margin around the viewport).
+
+        Returns:
+        - list: (M, 2) arrays of pixel coordinates (M >= 2), one per run.
+        """
+        if len(points) < 2:
+            return []
+        screen = self.to_screen(points)
+        inside = self.visible(screen, line_width)
+        segment = inside[:-1] | inside[1:]
+        if segment.all():
+            return [screen]
+        # Every run of kept segments [start, stop) covers the points start..stop
+        edges = np.flatnonzero(np.diff(np.r_[False, segment, False].astype(np.int8)))
+        return [screen[start:stop + 1] for start, stop in zip(edges[::2], edges[1::2])]
+
+    def draw_radius(self, radius):
+        """
+        Return the on-screen radius of a body (level of detail).
+
+        Parameters:
+        - radius (float): Radius of the body in pixels at zoom 1.
+
+        Returns:
+        - float: Radius in pixels at the current zoom, or 0 when the body is smaller than
+          LOD_PIXEL_RADIUS and is drawn as a single pixel without labels.
+        """
+        radius = radius * self.zoom
+        return radius if radius >= LOD_PIXEL_RADIUS else 0
+
+    def visible_bodies(self, solar_system_bodies):
+        """
+        Return the bodies that overlap the viewport.
+
+        The positions of all the bodies are converted and tested in one batched step, so
+        only the visible bodies cost any Python work.
+
+        Parameters:
+        - solar_system_bodies (list): List of SolarSystemBodies objects (must share the same NBodySystem).
+
+        Returns:
+        - list: Visible SolarSystemBodies objects.
+        """
+        if not solar_system_bodies:
+            return []
+        bodies, indices, radii = self._body_arrays
+        if bodies is not solar_system_bodies or len(indices) != len(solar_system_bodies):
+            indices = np.array([body.index for body in solar_system_bodies])
+            radii = np.array([body.simulator_radius for body in solar_system_bodies], dtype=float)
+            self._body_arrays = (solar_system_bodies, indices, radii)
+        screen = self.to_screen(solar_system_bodies[0].system.pos[indices])
+        visible = np.flatnonzero(self.visible(screen, np.maximum(radii * self.zoom, 1)))
+        return [solar_system_bodies[i] for i in visible]
+
+    def zoom_by(self, factor, screen_point=None):
+        """
+        Zoom the view, keeping a screen point fixed.
+
+        Parameters:
+        - factor (float): Magnification factor (> 1 zooms in). The zoom is kept within [MIN_ZOOM, MAX_ZOOM].
+        - screen_point (tuple): Pixel coordinates to keep fixed (default is the middle of the viewport).
+
+        Returns:
+        None
+        """
+        scale = np.clip(self.scale * factor, MIN_ZOOM * self.base_scale, MAX_ZOOM * self.base_scale)
+        if scale == self.scale:
+            return
+        if screen_point is not None:
+            offset = np.asarray(screen_point, dtype=float) - (self.width//2, self.height//2)
+            self.center = self.center + offset / self.scale - offset / scale
+        self.scale = float(scale)
+        self._changed()
+
+    def pan(self, dx, dy):
+        """
+        Move the view by a number of pixels.
+
+        Parameters:
+        - dx (float): Horizontal movement of the view in pixels (> 0 moves the view right).
+        - dy (float): Vertical movement of the view in pixels (> 0 moves the view down).
+
+        Returns:
+        None
+        """
+        if dx or dy:
+            self.center = self.center + np.array([dx, dy]) / self.scale
+            self._changed()
+
+    def reset(self):
+        """
+        Restore the initial view (centered on the origin at zoom 1).
+
+        Returns:
+        None
+        """
+        self.scale = self.base_scale
+        self.center = np.zeros(2)
+        self._changed()
+
+    def handle_event(self, event):
+        """
+        Apply the zoom/pan controls of a Pygame event.
+
+        Parameters:
+        - event (pygame.event.Event): Pygame event object.
+
+        Returns:
+        - bool: Whether the view changed.
+        """
+        version = self.version
+        if event.type == pg.MOUSEWHEEL:
+            self.zoom_by(ZOOM_STEP ** event.y, pg.mouse.get_pos())
+        elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+            self._dragging = True
+        elif event.type == pg.MOUSEBUTTONUP and event.button == 1:
+            self._dragging = False
+        elif event.type == pg.MOUSEMOTION and self._dragging:
+            self.pan(-event.rel[0], -event.rel[1])
+        elif event.type == pg.KEYDOWN:
+            if event.key in (pg.K_PLUS, pg.K_EQUALS, pg.K_KP_PLUS):
+                self.zoom_by(ZOOM_STEP)
+            elif event.key in (pg.K_MINUS, pg.K_KP_MINUS):
+                self.zoom_by(1 / ZOOM_STEP)
+            elif event.key == pg.K_a:
+                self.pan(-PAN_STEP, 0)
+            elif event.key == pg.K_d:
+                self.pan(PAN_STEP, 0)
+            elif event.key == pg.K_w:
+                self.pan(0, -PAN_STEP)
+            elif event.key == pg.K_s:
+                self.pan(0, PAN_STEP)
+            elif event.key == pg.K_c:
+                self.reset()
+        return self.version != version
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import numpy as np
+import colors
+from colors import GRAY_COLOR
+from solar_system import SolarSystemBodies
+
+"""
+Bulk loader of celestial bodies from a CSV or JSON catalog (e.g. thousands of minor planets).
+
+All the columns are parsed into NumPy arrays and added to the NBodySystem in one
+batched step (NBodySystem.add_bodies), so large catalogs load without a Python-level
+physics update per body.
+
+Catalog columns (CSV header or JSON keys):
+- name (str): Name of the body (default is "Body <row>").
+- x, y (float): Initial position in Astronomical Units (AU).
+- mass (float): Mass in Kg (0 for massless test particles, which are much cheaper to simulate).
+- x_vel, y_vel (float): Initial velocity in m/s (default is 0).
+- radius (float): Circle radius in the simulator in pixels (default is 1).
+- color (str): Name of a color in colors.py (e.g. "RED_COLOR") or "#rrggbb" (default is GRAY_COLOR).
+- sun (bool): 1/true for the body at the center of the Simulator (default is none).
+
+A JSON catalog is either a list of records or an object of columns ({"x": [...], ...}).
+"""
+
+REQUIRED_COLUMNS = ('x', 'y', 'mass')
+
+def _read_csv(path):
+    """
+    Read the columns of a CSV catalog.
+
+    Parameters:
+    - path (str): Path of the CSV file (with a header row).
+
+    Returns:
+    - dict: Column name to numpy.ndarray (of strings, converted by add_catalog_bodies).
+    """
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader)]
+        rows = [row for row in reader if row]
+    columns = zip(*rows) if rows else [()]*len(header)
+    return {name: np.array(values, dtype=str) for name, values in zip(header, columns)}
+
+def _read_json(path):
+    """
+    Read the columns of a JSON catalog.
+
+    Parameters:
+    - path (str): Path of the JSON file (a list of records or an object of columns).
+
+    Returns:
+    - dict: Column name to numpy.ndarray.
+    """
+    with open(path) as file:
+        data = json.load(file)
+    if isinstance(data, list):
+        keys = dict.fromkeys(key for record in data[:1] for key in record)
+        data = {key: [record.get(key) for record in data] for key in keys}
+    return {key: np.asarray(values) for key, values in data.items()}
+
+def read_catalog(path):
+    """
+    Read a body catalog into columns.
+
+    Parameters:
+    - path (str): Path of the catalog (.csv or .json).
+
+    Raises:
+    - Exception: If the file type is not supported or a required column is missing.
+
+    Returns:
+    - dict: Column name to numpy.ndarray (one entry per body).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        columns = _read_csv(path)
+    elif extension == '.json':
+        columns = _read_json(path)
+    else:
+        raise Exception(f'Invalid catalog. Use a ".csv" or ".json" file. Provided catalog: {path}')
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise Exception(f'Invalid catalog. Missing columns {missing} in {path}')
+    return columns
+
+def _parse_color(value):
+    """
+    Convert a color of the catalog into an RGB tuple.
+
+    Parameters:
+    - value (str): Name of a color in colors.py or "#rrggbb".
+
+    Returns:
+    - tuple: RGB tuple.
+    """
+    value = str(value).strip()
+    if value.startswith('#') and len(value) == 7:
+        return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+    color = getattr(colors, value.upper(), None)
+    if color is None:
+        raise Exception(f'Invalid color. Use a name from colors.py or "#rrggbb". Provided color: {value}')
+    return color
+
+def add_catalog_bodies(columns, system):
+    """
+    Add the bodies of a catalog to a system.
+
+    Parameters:
+    - columns (dict): Columns returned by read_catalog.
+    - system (NBodySystem): Physics engine to store the bodies in.
+
+    Returns:
+    - list: New SolarSystemBodies objects, in the order of the catalog.
+    """
+    AU = SolarSystemBodies.AU
+    count = len(columns['mass'])
+    positions = np.column_stack([columns['x'], columns['y']]).astype(float) * AU
+    velocities = np.column_stack([columns.get('x_vel', np.zeros(count)),
+                                  columns.get('y_vel', np.zeros(count))]).astype(float)
+    masses = columns['mass'].astype(float)
+
+    sun_index = None
+    if 'sun' in columns:
+        sun = np.isin(np.char.lower(columns['sun'].astype(str)), ('1', 'true', 'yes'))
+        if sun.any():
+            sun_index = int(np.flatnonzero(sun)[0])
+    indices = system.add_bodies(positions, velocities, masses, sun_index)
+
+    names = columns['name'].astype(str).tolist() if 'name' in columns else [f'Body {i}' for i in range(count)]
+    radii = columns['radius'].astype(float).tolist() if 'radius' in columns else [1.0]*count
+    if 'color' in columns:
+        # Every distinct color is parsed once and its tuple shared by all its bodies
+        unique, inverse = np.unique(columns['color'].astype(str), return_inverse=True)
+        palette = [_parse_color(value) for value in unique]
+        body_colors = [palette[i] for i in inverse.ravel()]
+    else:
+        body_colors = [GRAY_COLOR]*count
+
+    return [SolarSystemBodies.from_system(system, index, name, color, radius, index == system.sun_index)
+            for index, name, color, radius in zip(indices.tolist(), names, body_colors, radii)]
+
+def load_catalog(path, system):
+    """
+    Read a body catalog and add its bodies to a system.
+
+    Parameters:
+    - path (str): Path of the catalog (.csv or .json).
+    - system (NBodySystem): Physics engine to store the bodies in.
+
+    Returns:
+    - list: New SolarSystemBodies objects, in the order of the catalog.
+    """
+    return add_catalog_bodies(read_catalog(path), system)
@@ -1,4 +1,5 @@
-from simulation import add_solar_system_body, solar_system_bodies
+from simulation import add_solar_system_body, load_body_catalog, solar_system_bodies, solar_system
+from parameters import BODY_CATALOG
 from colors import *
 
 # Use this guide to add the bodies to the simulator
@@ -60,4 +61,6 @@ add_solar_system_body(
     y_vel = 24.1e3
 )
 
-
+# Add the bodies of a catalog (e.g. thousands of minor planets) in one batch
+if BODY_CATALOG:
+    load_body_catalog(BODY_CATALOG)
@@ -0,0 +1,232 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+import numpy as np
+from physics import NBodySystem
+
+"""
+Headless ensemble and parameter-sweep runner for the Solar System Simulator.
+
+A sweep specification (JSON, see sweep.json) perturbs the initial conditions of the bodies
+in create_bodies.py and every resulting scenario is integrated in a process pool. One row
+of summary statistics per run is appended to a CSV results table as soon as the run
+finishes, so an interrupted sweep resumes from where it stopped.
+
+Sweep specification:
+- steps (int): Number of integration steps of every run.
+- time_step (float): Time step in seconds (default is one day).
+- integrator (str): Integrator name (default is "leapfrog").
+- solver (str): Force solver name (default is "direct").
+- runs (int): Number of random draws (multiplied by the number of grid points, default is 1).
+- seed (int): Seed of the random draws (default is 0).
+- perturbations (list): Each with a "body", a "parameter" (x or y in AU, x_vel or y_vel in m/s,
+  mass in Kg) and either:
+    - "values": list of values (the grid is the cartesian product of all such lists),
+    - "normal": standard deviation added to the value in create_bodies.py,
+    - "uniform": [low, high] range to draw the value from.
+"""
+
+AU = 1.496e11
+PARAMETERS = {'x': ('pos', 0, AU), 'y': ('pos', 1, AU), 'x_vel': ('vel', 0, 1), 'y_vel': ('vel', 1, 1),
+              'mass': ('mass', None, 1)}
+
+def base_state(system, names):
+    """
+    Capture the initial state of a system as a picklable dictionary.
+
+    Parameters:
+    - system (NBodySystem): System of bodies (e.g. solar_system from create_bodies.py).
+    - names (list): Names of the bodies.
+
+    Returns:
+    - dict: Names, positions, velocities, masses and the index of the Sun.
+    """
+    return {
+        'names': list(names),
+        'pos': system.pos.copy(),
+        'vel': system.vel.copy(),
+        'mass': system.mass.copy(),
+        'sun_index': system.sun_index,
+    }
+
+def expand_sweep(spec, base):
+    """
+    Expand a sweep specification into the list of scenarios to run.
+
+    Parameters:
+    - spec (dict): Sweep specification.
+    - base (dict): Initial state from base_state.
+
+    Raises:
+    - Exception: If a perturbation refers to an unknown body, parameter or distribution.
+
+    Returns:
+    - list: Tuples of (run_id, overrides), where overrides maps "Body.parameter" to its value
+      in the units of the specification.
+    """
+    rng = np.random.default_rng(spec.get('seed', 0))
+    perturbations = spec.get('perturbations', [])
+    for perturbation in perturbations:
+        if perturbation['body'] not in base['names']:
+            raise Exception(f"Invalid body. Choose one of {base['names']}. Provided body: {perturbation['body']}")
+        if perturbation['parameter'] not in PARAMETERS:
+            raise Exception(f"Invalid parameter. Choose one of {list(PARAMETERS)}. "
+                            f"Provided parameter: {perturbation['parameter']}")
+        if not {'values', 'normal', 'uniform'} & set(perturbation):
+            raise Exception(f'Invalid perturbation. Give "values", "normal" or "uniform". Provided: {perturbation}')
+
+    grid = [p for p in perturbations if 'values' in p]
+    random = [p for p in perturbations if 'values' not in p]
+    scenarios = []
+    for point in itertools.product(*[p['values'] for p in grid]):
+        for _ in range(spec.get('runs', 1)):
+            overrides = {f"{p['body']}.{p['parameter']}": float(value) for p, value in zip(grid, point)}
+            for p in random:
+                key = f"{p['body']}.{p['parameter']}"
+                if 'normal' in p:
+                    overrides[key] = _base_value(base, p['body'], p['parameter']) + rng.normal(0, p['normal'])
+                else:
+                    overrides[key] = rng.uniform(*p['uniform'])
+            scenarios.append((len(scenarios), overrides))
+    return scenarios
+
+def _base_value(base, body, parameter):
+    """
+    Return the initial value of a parameter of a body in the units of the sweep specification.
+
+    Parameters:
+    - base (dict): Initial state from base_state.
+    - body (str): Name of the body.
+    - parameter (str): Name of the parameter.
+
+    Returns:
+    - float: Initial value.
+    """
+    array, column, unit = PARAMETERS[parameter]
+    index = base['names'].index(body)
+    value = base[array][index] if column is None else base[array][index, column]
+    return float(value) / unit
+
+def run_scenario(base, overrides, steps, time_step, integrator, solver):
+    """
+    Integrate one scenario and collect its summary statistics.
+
+    Parameters:
+    - base (dict): Initial state from base_state.
+    - overrides (dict): Values of "Body.parameter" in the units of the sweep specification.
+    - steps (int): Number of integration steps.
+    - time_step (float): Time step in seconds.
+    - integrator (str): Integrator name.
+    - solver (str): Force solver name.
+
+    Returns:
+    - dict: Minimum and maximum distance to the Sun (in AU) of every body, relative energy
+      error at the end of the run and the wall time in seconds.
+    """
+    system = NBodySystem(capacity=len(base['names']), solver=solver, integrator=integrator)
+    for index in range(len(base['names'])):
+        system.add_body(*base['pos'][index], base['mass'][index], *base['vel'][index],
+                        sun=index == base['sun_index'])
+    for key, value in overrides.items():
+        body, parameter = key.rsplit('.', 1)
+        array, column, unit = PARAMETERS[parameter]
+        index = base['names'].index(body)
+        if column is None:
+            getattr(system, array)[index] = value * unit
+        else:
+            getattr(system, array)[index, column] = value * unit
+    system.set_state(system.pos, system.vel, 0.0)
+
+    start = perf_counter()
+    energy_0 = system.total_energy()
+    min_distance = system.distance_to_sun.copy()
+    max_distance = system.distance_to_sun.copy()
+    for _ in range(steps):
+        system.step(time_step)
+        np.minimum(min_distance, system.distance_to_sun, out=min_distance)
+        np.maximum(max_distance, system.distance_to_sun, out=max_distance)
+
+    summary = {}
+    for index, name in enumerate(base['names']):
+        if index != base['sun_index']:
+            summary[f'{name}.min_distance_au'] = min_distance[index] / AU
+            summary[f'{name}.max_distance_au'] = max_distance[index] / AU
+    summary['energy_error'] = abs(system.total_energy() - energy_0) / abs(energy_0)
+    summary['wall_time'] = perf_counter() - start
+    return summary
+
+def _completed_runs(results_path):
+    """
+    Read the ids of the runs already in a results table.
+
+    Parameters:
+    - results_path (str): Path of the CSV results table.
+
+    Returns:
+    - set: Ids of the completed runs (a row cut short by a crash does not count).
+    """
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline='') as file:
+        return {int(row['run_id']) for row in csv.DictReader(file) if row.get('wall_time')}
+
+def run_sweep(spec, base, results_path, workers=None):
+    """
+    Run every scenario of a sweep in a process pool, checkpointing the results table.
+
+    Parameters:
+    - spec (dict): Sweep specification.
+    - base (dict): Initial state from base_state.
+    - results_path (str): Path of the CSV results table (runs already in it are skipped).
+    - workers (int): Number of worker processes (default is the number of CPUs).
+
+    Returns:
+    - int: Number of runs completed by this call.
+    """
+    scenarios = expand_sweep(spec, base)
+    done = _completed_runs(results_path)
+    pending = [(run_id, overrides) for run_id, overrides in scenarios if run_id not in done]
+    keys = list(scenarios[0][1]) if scenarios else []
+    fields = ['run_id'] + keys + [f'{name}.{stat}' for index, name in enumerate(base['names'])
+                                  if index != base['sun_index']
+                                  for stat in ('min_distance_au', 'max_distance_au')] + ['energy_error', 'wall_time']
+    settings = (spec['steps'], spec.get('time_step', 24*3600), spec.get('integrator', 'leapfrog'),
+                spec.get('solver', 'direct'))
+
+    new_table = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+    if not new_table:
+        # Terminate a row that was cut short by a crash, so the next row starts on its own line
+        with open(results_path, 'rb+') as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b'\n':
+                file.write(b'\n')
+
+    with open(results_path, 'a', newline='') as file, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        if new_table:
+            writer.writeheader()
+        futures = {pool.submit(run_scenario, base, overrides, *settings): (run_id, overrides)
+                   for run_id, overrides in pending}
+        for future in as_completed(futures):
+            run_id, overrides = futures[future]
+            writer.writerow({'run_id': run_id, **overrides, **future.result()})
+            file.flush()
+    return len(pending)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a parameter sweep of the Solar System Simulator.')
+    parser.add_argument('spec', help='Path of the JSON sweep specification.')
+    parser.add_argument('--output', default='sweep_results.csv', help='Path of the CSV results table.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes.')
+    args = parser.parse_args()
+
+    from create_bodies import solar_system, solar_system_bodies
+    with open(args.spec) as file:
+        sweep_spec = json.load(file)
+    completed = run_sweep(sweep_spec, base_state(solar_system, [body.name for body in solar_system_bodies]),
+                          args.output, args.workers)
+    print(f'Completed {completed} runs, results in {args.output}')
@@ -0,0 +1,314 @@
+from parameters import BLOCK_ETA, BLOCK_MAX_LEVEL
+import numpy as np
+
+"""
+Integrators for the NBodySystem.
+
+Every integrator advances all the bodies of a system by one time step `dt`. All the
+accelerations of a stage are computed from the positions of every body before any
+body moves, so the result does not depend on the order of the bodies.
+
+- euler: Semi-implicit (symplectic) Euler, 1st order, one force evaluation per step.
+- leapfrog: Kick-drift-kick leapfrog, 2nd order, one force evaluation per step
+  (the acceleration at the end of a step is reused at the start of the next one,
+  see NBodySystem.accelerations).
+- yoshida: 4th order Yoshida composition of leapfrog, three force evaluations per step.
+- block: Kick-drift-kick leapfrog with hierarchical block time steps, where every body
+  advances on its own power-of-two fraction of `dt` (see BlockTimestep).
+"""
+
+# Yoshida 4th order coefficients
+_CBRT2 = 2**(1/3)
+_W1 = 1 / (2 - _CBRT2)
+_W0 = -_CBRT2 / (2 - _CBRT2)
+YOSHIDA_C = (_W1/2, (_W0 + _W1)/2, (_W0 + _W1)/2, _W1/2)
+YOSHIDA_D = (_W1, _W0, _W1)
+
+def semi_implicit_euler(system, dt):
+    """
+    Advance the system by one step of the semi-implicit Euler method.
+
+    Equations:
+        v_new = v_old + a(r_old) * dt
+        r_new = r_old + v_new * dt
+
+    Parameters:
+    - system (NBodySystem): System of bodies.
+    - dt (float): Time step in seconds.
+
+    Returns:
+    None
+    """
+    pos, vel = system.pos, system.vel
+    vel += system.accelerations() * dt
+    pos += vel * dt
+
+def leapfrog(system, dt):
+    """
+    Advance the system by one step of the kick-drift-kick leapfrog method.
+
+    Equations:
+        v_half = v_old + a(r_old) * dt/2
+        r_new = r_old + v_half * dt
+        v_new = v_half + a(r_new) * dt/2
+
+    Parameters:
+    - system (NBodySystem): System of bodies.
+    - dt (float): Time step in seconds.
+
+    Returns:
+    None
+    """
+    pos, vel = system.pos, system.vel
+    vel += system.accelerations() * (dt/2)
+    pos += vel * dt
+    vel += system.accelerations() * (dt/2)
+
+def yoshida4(system, dt):
+    """
+    Advance the system by one step of the 4th order Yoshida method.
+
+    Equations (with the coefficients c1..c4 and d1..d3 of Yoshida, 1990):
+        r += c1*v*dt, v += d1*a(r)*dt, r += c2*v*dt, v += d2*a(r)*dt,
+        r += c3*v*dt, v += d3*a(r)*dt, r += c4*v*dt
+
+    Parameters:
+    - system (NBodySystem): System of bodies.
+    - dt (float): Time step in seconds.
+
+    Returns:
+    None
+    """
+    pos, vel = system.pos, system.vel
+    for c, d in zip(YOSHIDA_C, YOSHIDA_D):
+        pos += vel * (c*dt)
+        vel += system.accelerations() * (d*dt)
+    pos += vel * (YOSHIDA_C[-1]*dt)
+
+# Class Info
+"""
+Hierarchical block time step scheduler (kick-drift-kick leapfrog).
+
+Every body i advances with its own step dt / 2^level_i, where the level is chosen from
+its local timescale |a| / |da/dt| (estimated from its last two force evaluations, or
+|v| / |a| before the first one):
+
+    dt_i = eta * |a_i| / |da_i/dt|,   level_i = ceil(log2(dt / dt_i)) clipped to [0, max_level]
+
+Time is counted in ticks of dt / 2^max_level. All the bodies drift together to the next
+tick at which any body finishes its step, and only those bodies get a new force
+evaluation and their closing and opening kicks. A body may move to a finer level at the
+end of any of its steps, and to a coarser level only when the current tick is aligned
+with the coarser step, so every body is synchronized again at the end of `dt`.
+
+The cached accelerations and levels belong to the state left by the previous block step.
+When the system changed in between (NBodySystem.version, e.g. set_state when a replay
+seeks or add_body), the scheduler starts again from fresh force evaluations.
+
+Attributes:
+- eta (float): Accuracy parameter of the time step criterion.
+- max_level (int): Finest level (smallest step is dt / 2^max_level).
+- levels (numpy.ndarray): Current level of every body.
+- force_evaluations (int): Number of single-body force evaluations so far.
+- shared_evaluations (int): Number of single-body force evaluations that a shared step
+  equal to the smallest step in use would have needed.
+
+Methods:
+- __call__: Advances the system by one block step `dt`.
+- stats: Returns the counters of the scheduler.
+"""
+
+class BlockTimestep:
+
+    def __init__(self, eta=0.02, max_level=8):
+        """
+        Initialize the scheduler.
+
+        Parameters:
+        - eta (float): Accuracy parameter of the time step criterion (default is 0.02).
+        - max_level (int): Finest level, the smallest step is dt / 2^max_level (default is 8).
+
+        Returns:
+        None
+        """
+        self.eta = eta
+        self.max_level = max_level
+        self.levels = None
+        self.force_evaluations = 0
+        self.shared_evaluations = 0
+        self._acc = None
+        self._prev_time = None
+        self._version = None
+
+    def _choose_levels(self, dt, acc, prev_acc, vel, elapsed):
+        """
+        Choose the level of the given bodies from their local timescale.
+
+        Parameters:
+        - dt (float): Block step in seconds.
+        - acc (numpy.ndarray): (M, 2) current accelerations of the bodies.
+        - prev_acc (numpy.ndarray): (M, 2) accelerations of the bodies at their previous force evaluation.
+        - vel (numpy.ndarray): (M, 2) current velocities of the bodies.
+        - elapsed (numpy.ndarray): (M,) time since the previous force evaluation of the bodies (0 if none).
+
+        Returns:
+        - numpy.ndarray: (M,) levels of the bodies.
+        """
+        acc_norm = np.linalg.norm(acc, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jerk = np.linalg.norm(acc - prev_acc, axis=1) / elapsed
+            timescale = np.where(elapsed > 0, acc_norm / jerk, np.linalg.norm(vel, axis=1) / acc_norm)
+            levels = np.ceil(np.log2(dt / (self.eta * timescale)))
+        levels = np.nan_to_num(levels, nan=0, posinf=self.max_level, neginf=0)
+        return np.clip(levels, 0, self.max_level).astype(np.int64)
+
+    def _evaluate(self, system, bodies, now, dt):
+        """
+        Evaluate the forces of the given bodies and choose their next levels.
+
+        Parameters:
+        - system (NBodySystem): System of bodies.
+        - bodies (numpy.ndarray): Indices of the bodies.
+        - now (float): Current time (in seconds since the scheduler started).
+        - dt (float): Block step in seconds.
+
+        Returns:
+        - numpy.ndarray: New levels of the bodies.
+        """
+        acc = system.accelerations(targets=bodies)
+        self.force_evaluations += len(bodies)
+        elapsed = np.where(np.isnan(self._prev_time[bodies]), 0, now - self._prev_time[bodies])
+        levels = self._choose_levels(dt, acc, self._acc[bodies], system.vel[bodies], elapsed)
+        self._acc[bodies] = acc
+        self._prev_time[bodies] = now
+        return levels
+
+    def __call__(self, system, dt):
+        """
+        Advance the system by one block step.
+
+        Parameters:
+        - system (NBodySystem): System of bodies.
+        - dt (float): Block (largest) step in seconds.
+
+        Returns:
+        None
+        """
+        n = system.size
+        if self.levels is None or len(self.levels) != n or self._version != system.version:
+            self._acc = np.zeros((n, 2))
+            self._prev_time = np.full(n, np.nan)
+            self._time = 0.0
+            self.levels = self._evaluate(system, np.arange(n), self._time, dt)
+
+        pos, vel = system.pos, system.vel
+        ticks = 1 << self.max_level
+        tick = dt / ticks
+        span = 1 << (self.max_level - self.levels)    # Step of every body in ticks
+        end = span.copy()                             # Tick at which every body ends its step
+        vel += self._acc * (span * tick / 2)[:, np.newaxis]
+        finest = int(self.levels.max())
+
+        now = 0
+        while now < ticks:
+            next_tick = int(end.min())
+            pos += vel * ((next_tick - now) * tick)
+            now = next_tick
+            active = np.flatnonzero(end == now)
+
+            # Closing kick with the new forces
+            levels = self._evaluate(system, active, self._time + now*tick, dt)
+            vel[active] += self._acc[active] * (span[active] * tick / 2)[:, np.newaxis]
+
+            # Coarser levels are only allowed when this tick is aligned with the coarser step
+            while True:
+                misaligned = now % (1 << (self.max_level - levels)) != 0
+                if not misaligned.any():
+                    break
+                levels[misaligned] += 1
+            self.levels[active] = levels
+            finest = max(finest, int(levels.max(initial=0)))
+
+            # Opening kick of the next step (every body is synchronized at the end of dt)
+            if now < ticks:
+                span[active] = 1 << (self.max_level - levels)
+                end[active] = now + span[active]
+                vel[active] += self._acc[active] * (span[active] * tick / 2)[:, np.newaxis]
+        self.shared_evaluations += n * (1 << finest)
+        self._time += dt
+        self._version = system.version
+
+    def stats(self):
+        """
+        Return the counters of the scheduler.
+
+        Returns:
+        - dict: Force evaluations, the evaluations a shared smallest step would need, their ratio
+          and the number of bodies on every level.
+        """
+        return {
+            'force_evaluations': self.force_evaluations,
+            'shared_evaluations': self.shared_evaluations,
+            'savings': self.shared_evaluations / self.force_evaluations if self.force_evaluations else 1.0,
+            'levels': np.bincount(self.levels, minlength=self.max_level + 1).tolist() if self.levels is not None else [],
+        }
+
+# Number of new force evaluations per step of every integrator (per body, for the block scheduler it varies)
+FORCE_EVALUATIONS = {'euler': 1, 'leapfrog': 1, 'yoshida': 3, 'block': None}
+
+INTEGRATORS = {
+    'euler': semi_implicit_euler,
+    'leapfrog': leapfrog,
+    'yoshida': yoshida4,
+    'block': BlockTimestep,
+}
+
+def get_integrator(name):
+    """
+    Return the integrator function for a given name.
+
+    Parameters:
+    - name (str): Name of the integrator, one of "euler", "leapfrog", "yoshida" or "block".
+
+    Raises:
+    - Exception: If the provided name is not a known integrator.
+
+    Returns:
+    - function: Integrator taking (system, dt) (a new BlockTimestep scheduler for "block").
+    """
+    integrator = INTEGRATORS.get(name.lower())
+    if integrator is None:
+        raise Exception(f'Invalid integrator. Choose one of {list(INTEGRATORS)}. Provided integrator: {name}')
+    if integrator is BlockTimestep:
+        return BlockTimestep(eta=BLOCK_ETA, max_level=BLOCK_MAX_LEVEL)
+    return integrator
+
+def energy_drift(system, integrator, dt, num_steps):
+    """
+    Measure the drift of the total energy when integrating a copy of the system.
+
+    Parameters:
+    - system (NBodySystem): System of bodies (left unchanged).
+    - integrator (str): Name of the integrator.
+    - dt (float): Time step in seconds.
+    - num_steps (int): Number of steps to integrate.
+
+    Returns:
+    - dict: Integrator, time step, number of steps, force evaluations per step and the
+      maximum and final relative energy error |E - E0| / |E0|.
+    """
+    trial = system.copy()
+    trial.integrator = integrator
+    energy_0 = trial.total_energy()
+    errors = np.empty(num_steps)
+    for i in range(num_steps):
+        trial.step(dt)
+        errors[i] = abs(trial.total_energy() - energy_0) / abs(energy_0)
+    return {
+        'integrator': integrator,
+        'time_step': dt,
+        'steps': num_steps,
+        'force_evaluations_per_step': FORCE_EVALUATIONS[integrator.lower()],
+        'max_energy_error': float(errors.max()) if num_steps else 0.0,
+        'final_energy_error': float(errors[-1]) if num_steps else 0.0,
+    }
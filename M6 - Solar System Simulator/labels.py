@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from parameters import LABEL_CACHE_SIZE
+
+# Class Info
+"""
+Cache of the rendered text surfaces used for the labels of the celestial bodies.
+
+Name labels never change, so they are rendered once and kept for the lifetime of
+the cache. Distance labels change with the rounded distance, so they are kept in a
+bounded LRU and only rendered on a miss.
+
+Attributes:
+- maxsize (int): Maximum number of distance labels kept in the LRU.
+- hits (int): Number of distance label lookups served from the LRU.
+- misses (int): Number of distance label lookups that had to be rendered.
+
+Methods:
+- name: Returns the surface of a name label.
+- distance: Returns the surface of a distance label.
+- stats: Returns the counters of the cache.
+- clear: Removes all the cached surfaces and resets the counters.
+"""
+
+class LabelCache:
+
+    def __init__(self, maxsize=LABEL_CACHE_SIZE):
+        """
+        Initialize an empty label cache.
+
+        Parameters:
+        - maxsize (int): Maximum number of distance labels kept in the LRU.
+
+        Returns:
+        None
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._names = {}
+        self._distances = OrderedDict()
+
+    def name(self, font, text, color):
+        """
+        Return the surface of a name label, rendering it only the first time.
+
+        Parameters:
+        - font (pygame.font.Font): Font for the label.
+        - text (str): Text of the label.
+        - color (tuple): RGB tuple of the text color.
+
+        Returns:
+        - pygame.Surface: Rendered label.
+        """
+        key = (font, text, color)
+        surface = self._names.get(key)
+        if surface is None:
+            surface = self._names[key] = font.render(text, True, color)
+        return surface
+
+    def distance(self, font, text, color):
+        """
+        Return the surface of a distance label from the LRU, rendering it on a miss.
+
+        Parameters:
+        - font (pygame.font.Font): Font for the label.
+        - text (str): Text of the label.
+        - color (tuple): RGB tuple of the text color.
+
+        Returns:
+        - pygame.Surface: Rendered label.
+        """
+        key = (font, text, color)
+        surface = self._distances.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._distances.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self._distances[key] = font.render(text, True, color)
+        if len(self._distances) > self.maxsize:
+            self._distances.popitem(last=False)
+        return surface
+
+    def stats(self):
+        """
+        Return the counters of the cache.
+
+        Returns:
+        - dict: Number of hits, misses, cached name and distance labels, and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'names': len(self._names),
+            'distances': len(self._distances),
+        }
+
+    def clear(self):
+        """
+        Remove all the cached surfaces and reset the counters.
+
+        Returns:
+        None
+        """
+        self._names.clear()
+        self._distances.clear()
+        self.hits = 0
+        self.misses = 0
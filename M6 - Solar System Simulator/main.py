@@ -8,46 +8,81 @@ from random import randint
 import pygame as pg
 
 # Local Imports
-from simulation import get_screen_size, create_pygame_window, set_simulation_fonts, simulator
+from simulation import get_screen_size, create_pygame_window, set_simulation_fonts, simulator, run_headless
 from stars import generate_stars
-from parameters import SIMULATION_FPS, TRACK_ORBIT
+from recorder import TrajectoryRecorder, TrajectoryReader
+from parameters import SIMULATION_FPS, TRACK_ORBIT, FORCE_SOLVER, HEADLESS, HEADLESS_STEPS, NUM_STARS
 from parameters import BODY_FONT_NAME, DISTANCE_FONT_NAME, PAUSE_FONT_NAME
 from parameters import BODY_FONT_SIZE, DISTANCE_FONT_SIZE, PAUSE_FONT_SIZE
-from create_bodies import solar_system_bodies
+from parameters import RECORD_TRAJECTORY, REPLAY_TRAJECTORY, RECORDING_DIR, RECORD_CHUNK_FRAMES
+from create_bodies import solar_system_bodies, solar_system
 from colors import *
 
 """Solar System Simulator using PyGame"""
 
-# Initialize Pygame
-pg.init()
-
-# Pygame Window Setup
-WIDTH, HEIGHT = get_screen_size()
-WINDOW = create_pygame_window(WIDTH, HEIGHT)
-
-# Font Setup
-NAME_FONT, DISTANCE_FONT, PAUSE_FONT = set_simulation_fonts(
-    body_font_name=BODY_FONT_NAME, body_font_size=BODY_FONT_SIZE,
-    distance_font_name=DISTANCE_FONT_NAME, distance_font_size=DISTANCE_FONT_SIZE,
-    pause_font_name=PAUSE_FONT_NAME, pause_font_size=PAUSE_FONT_SIZE
-)
-
-# Generate the Background Stars for Simulation
-stars_list = generate_stars(num_stars = 450, width = WIDTH, height = HEIGHT)
-
-# Run the Simulation
-simulator(
-    simulation_fps = SIMULATION_FPS,
-    window = WINDOW,
-    width = WIDTH,
-    height = HEIGHT,
-    name_font = NAME_FONT,
-    dist_font = DISTANCE_FONT,
-    pause_font = PAUSE_FONT,
-    stars_list = stars_list,
-    track = TRACK_ORBIT
-)
-
-# Quit the Pygame
-pg.quit()
+# Report the accuracy of the Barnes-Hut solver against the direct sum
+if FORCE_SOLVER == 'barnes_hut':
+    accuracy = solar_system.solver_accuracy()
+    print(f"Barnes-Hut (theta={accuracy['theta']}) on {accuracy['bodies']} bodies: "
+          f"median error {accuracy['median_rel_error']:.2e}, 99th percentile {accuracy['p99_rel_error']:.2e}, "
+          f"max error {accuracy['max_rel_error']:.2e}")
+    if (solar_system.mass > 0).sum() < solar_system.min_tree_bodies:
+        print(f"Fewer than {solar_system.min_tree_bodies} bodies with mass: the direct sum is used instead of the tree")
 
+# Setup the Trajectory Recording or Replay
+recorder, replay = None, None
+if REPLAY_TRAJECTORY:
+    replay = TrajectoryReader(RECORDING_DIR)
+    if replay.names != [body.name for body in solar_system_bodies]:
+        raise Exception(f'The bodies of the recording {replay.names} do not match the bodies in create_bodies.py')
+elif RECORD_TRAJECTORY:
+    recorder = TrajectoryRecorder(RECORDING_DIR, [body.name for body in solar_system_bodies],
+                                  solar_system.mass, RECORD_CHUNK_FRAMES, system=solar_system)
+
+# Write the remaining frames of the recording even if the simulation stops with an error
+try:
+    # Run the Simulation without a display
+    if HEADLESS:
+        summary = run_headless(solar_system_bodies, num_steps=HEADLESS_STEPS, recorder=recorder)
+        print(f"Simulated {summary['simulated_days']:.0f} days in {summary['wall_time']:.2f} s "
+              f"({summary['steps_per_second']:.0f} steps/s), energy error {summary['energy_error']:.2e}")
+
+    else:
+        # Initialize Pygame
+        pg.init()
+
+        # Pygame Window Setup
+        WIDTH, HEIGHT = get_screen_size()
+        WINDOW = create_pygame_window(WIDTH, HEIGHT)
+
+        # Font Setup
+        NAME_FONT, DISTANCE_FONT, PAUSE_FONT = set_simulation_fonts(
+            body_font_name=BODY_FONT_NAME, body_font_size=BODY_FONT_SIZE,
+            distance_font_name=DISTANCE_FONT_NAME, distance_font_size=DISTANCE_FONT_SIZE,
+            pause_font_name=PAUSE_FONT_NAME, pause_font_size=PAUSE_FONT_SIZE
+        )
+
+        # Generate the Background Stars for Simulation
+        stars_list = generate_stars(num_stars = NUM_STARS, width = WIDTH, height = HEIGHT)
+
+        # Run the Simulation
+        simulator(
+            simulation_fps = SIMULATION_FPS,
+            window = WINDOW,
+            width = WIDTH,
+            height = HEIGHT,
+            name_font = NAME_FONT,
+            dist_font = DISTANCE_FONT,
+            pause_font = PAUSE_FONT,
+            stars_list = stars_list,
+            track = TRACK_ORBIT,
+            recorder = recorder,
+            replay = replay
+        )
+
+        # Quit the Pygame
+        pg.quit()
+
+finally:
+    if recorder is not None:
+        recorder.close()
@@ -2,8 +2,49 @@
 SIMULATION_SCALE = 250
 SIMULATION_FPS = 60
 TRACK_ORBIT = False
+TRAIL_LENGTH = 2000    # Maximum number of points kept in each orbit trail
+TRAIL_DECIMATION = 1   # Store only every n-th position in the orbit trails
+NUM_STARS = 450        # Number of stars in the background (drawn once, so large counts are free per frame)
+BODY_CATALOG = None    # Path of a CSV/JSON catalog of extra bodies, e.g. 'minor_planets.csv' (see catalog.py)
+
+# Setup the Camera (mouse wheel or +/- to zoom, drag or W/A/S/D to pan, C to reset)
+ZOOM_STEP = 1.25          # Zoom factor of one mouse wheel notch or key press
+MIN_ZOOM, MAX_ZOOM = 0.01, 1000
+PAN_STEP = 50             # Pixels moved by one pan key press
+LOD_PIXEL_RADIUS = 1.0    # Bodies smaller than this (in pixels) are drawn as single pixels without labels
+
+# Setup the Physics Loop (physics runs in fixed TIME_STEP substeps, independent of the frame rate)
+SIMULATED_DAYS_PER_SECOND = 60  # Simulated days advanced per real second
+MAX_SUBSTEPS_PER_FRAME = 16     # Upper limit of physics substeps in one rendered frame
+
+# Setup the Headless Mode (no window, fonts or pg.init(); runs as fast as the CPU allows)
+HEADLESS = False
+HEADLESS_STEPS = 365*100
+
+# Setup the Trajectory Recording and Replay (recordings are chunked .npy files read with memory mapping)
+RECORD_TRAJECTORY = False   # Stream every physics step to RECORDING_DIR
+REPLAY_TRAJECTORY = False   # Play back RECORDING_DIR instead of running the physics
+RECORDING_DIR = 'recordings/solar_system'
+RECORD_CHUNK_FRAMES = 4096  # Frames per chunk file
+
+# Setup the Frame Profiler (press H to toggle the performance HUD)
+PROFILE = False          # Time every phase of every frame from the start (showing the HUD turns it on too)
+PROFILE_HISTORY = 300    # Frames in the rolling window of the HUD percentiles
+PROFILE_EXPORT = None    # Path of a CSV file to write the timings of every frame to, e.g. 'profile.csv'
+
+# Setup the Force Solver ('direct' for all-pairs, 'barnes_hut' for large body counts)
+FORCE_SOLVER = 'direct'
+BARNES_HUT_THETA = 0.3
+BARNES_HUT_MIN_BODIES = 2000    # Fewer bodies with mass are summed directly (the tree is not faster below it)
+
+# Setup the Integrator ('euler', 'leapfrog', 'yoshida' or 'block' for per-body block time steps)
+INTEGRATOR = 'leapfrog'
+BLOCK_ETA = 0.02       # Accuracy of the block time steps (smaller is more accurate)
+BLOCK_MAX_LEVEL = 8    # Finest block time step is TIME_STEP / 2^BLOCK_MAX_LEVEL
 
 # Setup Fonts
 BODY_FONT_NAME, BODY_FONT_SIZE = 'TimesRoman', 18
 DISTANCE_FONT_NAME, DISTANCE_FONT_SIZE = 'Sans', 18
-PAUSE_FONT_NAME, PAUSE_FONT_SIZE = 'TimesRoman', 45
\ No newline at end of file
+PAUSE_FONT_NAME, PAUSE_FONT_SIZE = 'TimesRoman', 45
+HUD_FONT_NAME, HUD_FONT_SIZE = 'Courier', 14
+LABEL_CACHE_SIZE = 1024  # Maximum number of rendered distance labels kept in memory
@@ -0,0 +1,372 @@
+from barnes_hut import barnes_hut_accelerations, barnes_hut_accuracy
+from integrators import get_integrator
+import numpy as np
+
+# Class Info
+"""
+Struct-of-arrays N-body engine for the Solar System Simulator.
+
+Positions, velocities and masses of all the bodies are stored in contiguous NumPy
+arrays so that the pairwise gravitational accelerations can be computed in one
+batched step, without any trigonometry.
+
+Class Attributes:
+- G (float): Gravitational constant.
+- BLOCK_SIZE (int): Maximum number of pairwise interactions evaluated at once.
+- TREE_MIN_BODIES (int): Default smallest number of bodies with mass for which the "barnes_hut"
+  solver walks the tree (fewer are summed directly, which is as fast or faster, see barnes_hut.py).
+
+Attributes:
+- size (int): Number of bodies in the system.
+- time (float): Simulated time in seconds since the start of the simulation.
+- pos (numpy.ndarray): (N, 2) array of positions in metres.
+- vel (numpy.ndarray): (N, 2) array of velocities in m/s.
+- mass (numpy.ndarray): (N,) array of masses in Kg.
+- distance_to_sun (numpy.ndarray): (N,) array of distances to the Sun in metres.
+- sun_index (int): Index of the body at the center of the Simulator (None if not set).
+- version (int): Incremented whenever bodies are added or the state is changed outside of step
+  (add_body, add_bodies, update_body, set_state), so integrators can drop what they cached.
+- solver (str): Force solver, either "direct" or "barnes_hut".
+- theta (float): Opening angle of the Barnes-Hut solver.
+- min_tree_bodies (int): Smallest number of bodies with mass for which the Barnes-Hut solver is used.
+- integrator (str): Integrator used by step, one of "euler", "leapfrog", "yoshida" or "block".
+
+Methods:
+- add_body: Appends a body to the arrays and returns its index.
+- add_bodies: Appends many bodies to the arrays at once and returns their indices.
+- accelerations: Calculates the gravitational acceleration on every body with the selected solver.
+- direct_accelerations: Calculates the gravitational acceleration on every body by direct summation.
+- solver_accuracy: Compares the Barnes-Hut accelerations with the direct-sum result.
+- step: Advances every body by one time step with the selected integrator.
+- update_body: Advances a single body by one time step.
+- set_state: Replaces the positions, velocities and time of all the bodies.
+- total_energy: Calculates the total (kinetic + potential) energy of the system.
+- copy: Returns an independent copy of the system.
+"""
+
+class NBodySystem:
+
+    G = 6.6743e-11
+    BLOCK_SIZE = 1 << 22
+    TREE_MIN_BODIES = 2000
+
+    def __init__(self, capacity=16, solver='direct', theta=0.3, integrator='euler', min_tree_bodies=None):
+        """
+        Initialize an empty system of bodies.
+
+        Parameters:
+        - capacity (int): Number of bodies to allocate room for (grows when needed).
+        - solver (str): Force solver, either "direct" or "barnes_hut" (default is "direct").
+        - theta (float): Opening angle of the Barnes-Hut solver (default is 0.3).
+        - integrator (str): Integrator used by step (default is "euler").
+        - min_tree_bodies (int): Smallest number of bodies with mass for which the Barnes-Hut solver
+          is used, the direct sum is used below it (default is TREE_MIN_BODIES).
+
+        Returns:
+        None
+        """
+        self.size = 0
+        self.time = 0.0
+        self._pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._mass = np.zeros(capacity)
+        self._distance_to_sun = np.zeros(capacity)
+        self.sun_index = None
+        self.version = 0
+
+        if solver.lower() not in ('direct', 'barnes_hut'):
+            raise Exception(f'Invalid solver. Choose either "direct" or "barnes_hut". Provided solver: {solver}')
+        self.solver = solver.lower()
+        self.theta = theta
+        self.min_tree_bodies = self.TREE_MIN_BODIES if min_tree_bodies is None else min_tree_bodies
+        self.integrator = integrator
+        self._cached_acc = None
+
+    @property
+    def integrator(self):
+        return self._integrator_name
+
+    @integrator.setter
+    def integrator(self, name):
+        self._integrator = get_integrator(name)
+        self._integrator_name = name.lower()
+
+    # Views of the filled part of the arrays
+    @property
+    def pos(self):
+        return self._pos[:self.size]
+
+    @property
+    def vel(self):
+        return self._vel[:self.size]
+
+    @property
+    def mass(self):
+        return self._mass[:self.size]
+
+    @property
+    def distance_to_sun(self):
+        return self._distance_to_sun[:self.size]
+
+    def _reserve(self, capacity):
+        """
+        Grow the arrays so that they can hold at least `capacity` bodies.
+
+        Parameters:
+        - capacity (int): Required number of bodies.
+
+        Returns:
+        None
+        """
+        if capacity <= len(self._mass):
+            return
+        new_capacity = max(capacity, 2*len(self._mass))
+        for name in ('_pos', '_vel', '_mass', '_distance_to_sun'):
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:])
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add_body(self, x, y, mass, x_vel=0, y_vel=0, sun=False):
+        """
+        Append a body to the system.
+
+        Parameters:
+        - x (float): Initial x-coordinate of the body in metres.
+        - y (float): Initial y-coordinate of the body in metres.
+        - mass (float): Mass of the body in Kg.
+        - x_vel (float): Initial x-component of velocity in m/s.
+        - y_vel (float): Initial y-component of velocity in m/s.
+        - sun (bool): Whether the body is the Sun (default is False).
+
+        Returns:
+        - index (int): Index of the body in the system arrays.
+        """
+        self._reserve(self.size + 1)
+        index = self.size
+        self._pos[index] = x, y
+        self._vel[index] = x_vel, y_vel
+        self._mass[index] = mass
+        self.size += 1
+        self.version += 1
+        if sun:
+            self.sun_index = index
+        self._update_distance_to_sun()
+        return index
+
+    def add_bodies(self, positions, velocities, masses, sun_index=None):
+        """
+        Append many bodies to the system in one batched step.
+
+        Parameters:
+        - positions (numpy.ndarray): (M, 2) array of initial positions in metres.
+        - velocities (numpy.ndarray): (M, 2) array of initial velocities in m/s.
+        - masses (numpy.ndarray): (M,) array of masses in Kg.
+        - sun_index (int): Index (among the new bodies) of the Sun (default is None).
+
+        Returns:
+        - numpy.ndarray: (M,) indices of the bodies in the system arrays.
+        """
+        count = len(masses)
+        self._reserve(self.size + count)
+        start = self.size
+        self._pos[start:start + count] = positions
+        self._vel[start:start + count] = velocities
+        self._mass[start:start + count] = masses
+        self.size += count
+        self.version += 1
+        if sun_index is not None:
+            self.sun_index = start + sun_index
+        self._update_distance_to_sun()
+        return np.arange(start, start + count)
+
+    def _update_distance_to_sun(self):
+        """
+        Refresh the distance of every body to the Sun.
+
+        Returns:
+        None
+        """
+        if self.sun_index is None:
+            return
+        diff = self.pos - self.pos[self.sun_index]
+        np.sqrt(np.einsum('ij,ij->i', diff, diff), out=self.distance_to_sun)
+
+    def accelerations(self, positions=None, targets=None):
+        """
+        Calculate the gravitational acceleration on the bodies with the selected solver.
+
+        Parameters:
+        - positions (numpy.ndarray): (N, 2) positions of all the bodies (default is the current positions).
+        - targets (numpy.ndarray): Indices of the bodies to evaluate (default is every body).
+
+        Returns:
+        - numpy.ndarray: (N, 2) array (or one row per target) of accelerations in m/s^2.
+
+        Note:
+        - The "barnes_hut" solver sums directly while there are fewer than min_tree_bodies bodies with mass.
+        - The accelerations of all the current positions are cached, so asking again before any
+          body moves (e.g. at the start of the next leapfrog step) costs no force evaluation.
+        """
+        if positions is None and targets is None:
+            cached = self._cached_acc
+            if cached is not None and np.array_equal(cached[0], self.pos) and np.array_equal(cached[1], self.mass):
+                return cached[2]
+            acc = self.accelerations(self.pos)
+            self._cached_acc = (self.pos.copy(), self.mass.copy(), acc)
+            return acc
+        pos = self.pos if positions is None else positions
+        if self.solver == 'barnes_hut' and np.count_nonzero(self.mass) >= self.min_tree_bodies:
+            target_pos = None if targets is None else pos[targets]
+            return barnes_hut_accelerations(pos, self.mass, self.theta, self.G, targets=target_pos)
+        return self.direct_accelerations(pos, targets)
+
+    def direct_accelerations(self, positions=None, targets=None):
+        """
+        Calculate the gravitational acceleration on the bodies by direct summation.
+
+        Parameters:
+        - positions (numpy.ndarray): (N, 2) positions of all the bodies (default is the current positions).
+        - targets (numpy.ndarray): Indices of the bodies to evaluate (default is every body).
+
+        Returns:
+        - numpy.ndarray: (N, 2) array (or one row per target) of accelerations in m/s^2.
+
+        Formula:
+        - a_i = G * sum_j m_j * (r_j - r_i) / |r_j - r_i|^3, for all j != i
+
+        Note:
+        - Only bodies with non-zero mass act as sources, so massless test particles cost O(N) each.
+        - The interaction matrix is evaluated in row blocks of at most BLOCK_SIZE
+          pairs, so memory stays bounded for large body counts.
+        """
+        pos = self.pos if positions is None else positions
+        n = len(pos)
+        targets = np.arange(n) if targets is None else np.asarray(targets)
+        sources = np.flatnonzero(self.mass)
+        source_pos, source_mass = pos[sources], self.mass[sources]
+        # Column of every body among the sources (-1 for massless bodies)
+        column = np.full(n, -1)
+        column[sources] = np.arange(len(sources))
+
+        acc = np.zeros((len(targets), 2))
+        rows = max(1, self.BLOCK_SIZE // max(len(sources), 1))
+        for start in range(0, len(targets), rows):
+            block = targets[start:start + rows]
+            diff = source_pos[np.newaxis, :, :] - pos[block, np.newaxis, :]
+            dist_sq = np.einsum('ijk,ijk->ij', diff, diff)
+            # Exclude the self-interaction of every body in this block
+            block_rows = np.flatnonzero(column[block] >= 0)
+            dist_sq[block_rows, column[block][block_rows]] = np.inf
+            weight = source_mass / (dist_sq * np.sqrt(dist_sq))
+            acc[start:start + rows] = np.einsum('ij,ijk->ik', weight, diff)
+        acc *= self.G
+        return acc
+
+    def solver_accuracy(self, theta=None):
+        """
+        Compare the Barnes-Hut accelerations of the current state with the direct-sum result.
+
+        Parameters:
+        - theta (float): Opening angle to test (default is the opening angle of the system).
+
+        Returns:
+        - dict: Relative error statistics and timings (see barnes_hut.barnes_hut_accuracy).
+        """
+        return barnes_hut_accuracy(self, self.theta if theta is None else theta)
+
+    def step(self, dt):
+        """
+        Advance every body by one time step using the selected integrator.
+
+        All the accelerations of a stage are computed from the current positions before any body moves.
+
+        Parameters:
+        - dt (float): Time step in seconds.
+
+        Returns:
+        None
+        """
+        self._integrator(self, dt)
+        self.time += dt
+        self._update_distance_to_sun()
+
+    def update_body(self, index, dt):
+        """
+        Advance a single body by one time step, keeping every other body fixed.
+
+        Parameters:
+        - index (int): Index of the body to advance.
+        - dt (float): Time step in seconds.
+
+        Returns:
+        None
+        """
+        diff = self.pos - self.pos[index]
+        dist_sq = np.einsum('ij,ij->i', diff, diff)
+        dist_sq[index] = np.inf
+        weight = self.mass / (dist_sq * np.sqrt(dist_sq))
+        self.vel[index] += self.G * (weight @ diff) * dt
+        self.pos[index] += self.vel[index] * dt
+        self.version += 1
+        self._update_distance_to_sun()
+
+    def set_state(self, positions, velocities, time):
+        """
+        Replace the positions, velocities and simulated time of all the bodies.
+
+        Parameters:
+        - positions (numpy.ndarray): (N, 2) array of positions in metres.
+        - velocities (numpy.ndarray): (N, 2) array of velocities in m/s.
+        - time (float): Simulated time in seconds.
+
+        Returns:
+        None
+        """
+        self.pos[:] = positions
+        self.vel[:] = velocities
+        self.time = time
+        self.version += 1
+        self._update_distance_to_sun()
+
+    def total_energy(self):
+        """
+        Calculate the total energy of the system.
+
+        Returns:
+        - float: Kinetic plus gravitational potential energy in Joules.
+
+        Formula:
+        - E = sum_i m_i |v_i|^2 / 2 - G * sum_{i<j} m_i m_j / |r_j - r_i|
+        """
+        kinetic = 0.5 * np.sum(self.mass * np.einsum('ij,ij->i', self.vel, self.vel))
+        sources = np.flatnonzero(self.mass)
+        pos, mass = self.pos[sources], self.mass[sources]
+        potential = 0.0
+        rows = max(1, self.BLOCK_SIZE // max(len(sources), 1))
+        for start in range(0, len(sources), rows):
+            stop = min(start + rows, len(sources))
+            diff = pos[np.newaxis, :, :] - pos[start:stop, np.newaxis, :]
+            dist = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+            # Count every pair once (j > i)
+            pairs = np.arange(len(sources))[np.newaxis, :] > np.arange(start, stop)[:, np.newaxis]
+            potential -= np.sum(np.where(pairs, mass[start:stop, np.newaxis] * mass / np.where(pairs, dist, 1), 0))
+        return float(kinetic + self.G * potential)
+
+    def copy(self):
+        """
+        Return an independent copy of the system.
+
+        Returns:
+        - NBodySystem: Copy of the system with its own arrays.
+        """
+        other = NBodySystem(capacity=max(self.size, 1), solver=self.solver, theta=self.theta,
+                            integrator=self.integrator, min_tree_bodies=self.min_tree_bodies)
+        other.size = self.size
+        other.time = self.time
+        other.sun_index = self.sun_index
+        other.pos[:] = self.pos
+        other.vel[:] = self.vel
+        other.mass[:] = self.mass
+        other.distance_to_sun[:] = self.distance_to_sun
+        return other
@@ -0,0 +1,254 @@
+import csv
+from time import perf_counter
+import numpy as np
+import pygame as pg
+from colors import WHITE_COLOR, BLACK_COLOR
+from parameters import PROFILE, PROFILE_HISTORY, PROFILE_EXPORT
+
+HUD_REFRESH_FRAMES = 15    # The HUD text is rendered again every n frames
+PHASES = ('events', 'physics', 'trails', 'background', 'bodies', 'hud', 'flip')
+
+# Class Info
+"""
+Timer of a single phase of the frame, used as a context manager (see FrameProfiler.phase).
+"""
+
+class _Phase:
+
+    __slots__ = ('times', 'column', 'start')
+
+    def __init__(self, times, column):
+        self.times = times
+        self.column = column
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.times[self.column] += perf_counter() - self.start
+
+# No-op phase returned while the profiler is disabled
+class _NullPhase:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+# Class Info
+"""
+Frame profiler with an on-screen performance HUD.
+
+Every frame is split into the phases of PHASES and the time spent in each of them is
+accumulated by `with profiler.phase(name):` blocks. When the profiler is disabled
+`phase` returns a shared no-op context, so the instrumentation costs one attribute
+lookup and one method call per phase.
+
+Phases:
+- events: Pygame event handling.
+- physics: Physics substeps (NBodySystem.step) or replay.
+- trails: Incremental drawing of the orbit trails (TrailLayer).
+- background: Restoring the starfield (and trails) under the regions of the previous frame.
+- bodies: Drawing the bodies and their labels (including text rendering).
+- hud: Drawing the HUD.
+- flip: Sending the dirty regions to the display.
+
+Attributes:
+- enabled (bool): Whether the phases are timed.
+- show_hud (bool): Whether the HUD is drawn (showing it enables the profiler).
+- history (int): Number of frames in the rolling window of the statistics.
+- frames (int): Number of frames recorded so far.
+- export_path (str): CSV file the timings of every frame are written to (None to disable).
+
+Methods:
+- phase: Returns the context manager timing a phase.
+- count_steps: Adds physics steps to the current frame.
+- end_frame: Closes the current frame and starts the next one.
+- stats: Returns rolling percentiles of every phase and the physics steps per second.
+- toggle_hud: Shows or hides the HUD.
+- handle_event: Toggles the HUD with the 'H' key.
+- draw_hud: Draws the HUD on the window.
+- close: Closes the export file.
+"""
+
+class FrameProfiler:
+
+    def __init__(self, enabled=PROFILE, history=PROFILE_HISTORY, export_path=PROFILE_EXPORT):
+        """
+        Initialize the profiler.
+
+        Parameters:
+        - enabled (bool): Whether to time the phases from the start (default is PROFILE).
+        - history (int): Number of frames in the rolling window of the statistics (default is PROFILE_HISTORY).
+        - export_path (str): CSV file to write the timings of every frame to (default is PROFILE_EXPORT).
+          Exporting enables the profiler.
+
+        Returns:
+        None
+        """
+        self.enabled = enabled or export_path is not None
+        self.show_hud = False
+        self.history = history
+        self.frames = 0
+        self.export_path = export_path
+        # Columns: one per phase, then the total frame time and the physics steps
+        self._current = np.zeros(len(PHASES) + 2)
+        self._window = np.zeros((history, len(PHASES) + 2))
+        self._phases = {name: _Phase(self._current, column) for column, name in enumerate(PHASES)}
+        self._null_phase = _NullPhase()
+        self._frame_start = perf_counter()
+        self._hud_surface = None
+
+        self._export_file, self._writer = None, None
+        if export_path is not None:
+            self._export_file = open(export_path, 'w', newline='')
+            self._writer = csv.writer(self._export_file)
+            self._writer.writerow(['frame'] + [f'{name}_ms' for name in PHASES] + ['frame_ms', 'physics_steps'])
+
+    def phase(self, name):
+        """
+        Return the context manager timing a phase of the current frame.
+
+        Parameters:
+        - name (str): Name of the phase (one of PHASES).
+
+        Returns:
+        - context manager: Adds the time spent inside it to the phase (no-op when disabled).
+        """
+        return self._phases[name] if self.enabled else self._null_phase
+
+    def count_steps(self, steps):
+        """
+        Add physics steps to the current frame.
+
+        Parameters:
+        - steps (int): Number of physics steps taken.
+
+        Returns:
+        None
+        """
+        self._current[-1] += steps
+
+    def end_frame(self, record=True):
+        """
+        Close the current frame and start the next one.
+
+        Parameters:
+        - record (bool): Whether to keep the timings of this frame (e.g. False while paused).
+
+        Returns:
+        None
+        """
+        now = perf_counter()
+        if self.enabled and record:
+            self._current[-2] = now - self._frame_start
+            self._window[self.frames % self.history] = self._current
+            if self._writer is not None:
+                self._writer.writerow([self.frames] + [round(t*1000, 4) for t in self._current[:-1]] +
+                                      [int(self._current[-1])])
+            self.frames += 1
+        self._current[:] = 0
+        self._frame_start = now
+
+    def stats(self):
+        """
+        Return the statistics of the frames in the rolling window.
+
+        Returns:
+        - dict: Number of frames, the 50th/95th/99th percentile (in ms) of every phase and of the
+          whole frame, frames per second and physics steps per second.
+        """
+        frames = min(self.frames, self.history)
+        if frames == 0:
+            return {'frames': 0, 'phases': {}, 'fps': 0.0, 'steps_per_second': 0.0}
+        window = self._window[:frames]
+        percentiles = np.percentile(window[:, :-1], [50, 95, 99], axis=0) * 1000
+        total_time = window[:, -2].sum()
+        return {
+            'frames': frames,
+            'phases': {name: tuple(percentiles[:, column].tolist())
+                       for column, name in enumerate(PHASES + ('frame',))},
+            'fps': frames / total_time if total_time > 0 else 0.0,
+            'steps_per_second': window[:, -1].sum() / total_time if total_time > 0 else 0.0,
+        }
+
+    def toggle_hud(self):
+        """
+        Show or hide the HUD (showing it enables the profiler).
+
+        Returns:
+        None
+        """
+        self.show_hud = not self.show_hud
+        self.enabled = self.enabled or self.show_hud
+        self._hud_surface = None
+
+    def handle_event(self, event):
+        """
+        Toggle the HUD with the 'H' key.
+
+        Parameters:
+        - event (pygame.event.Event): Pygame event object.
+
+        Returns:
+        - bool: Whether the HUD was toggled.
+        """
+        if event.type == pg.KEYDOWN and event.key == pg.K_h:
+            self.toggle_hud()
+            return True
+        return False
+
+    def _render_hud(self, font):
+        """
+        Render the statistics into a new HUD surface.
+
+        Parameters:
+        - font (pygame.font.Font): Font of the HUD.
+
+        Returns:
+        - pygame.Surface: HUD surface.
+        """
+        stats = self.stats()
+        lines = [f"{stats['fps']:6.1f} fps  {stats['steps_per_second']:8.0f} steps/s",
+                 f"{'phase':<10}{'p50':>8}{'p95':>8}{'p99':>8} ms"]
+        for name, (p50, p95, p99) in stats['phases'].items():
+            lines.append(f'{name:<10}{p50:8.2f}{p95:8.2f}{p99:8.2f}')
+        rendered = [font.render(line, True, WHITE_COLOR) for line in lines]
+        surface = pg.Surface((max(text.get_width() for text in rendered) + 10,
+                              sum(text.get_height() for text in rendered) + 10))
+        surface.fill(BLACK_COLOR)
+        y = 5
+        for text in rendered:
+            surface.blit(text, (5, y))
+            y += text.get_height()
+        return surface
+
+    def draw_hud(self, window, font, position=(10, 10)):
+        """
+        Draw the HUD on the window (the text is rendered again every HUD_REFRESH_FRAMES frames).
+
+        Parameters:
+        - window (pygame.Surface): Pygame window surface.
+        - font (pygame.font.Font): Font of the HUD.
+        - position (tuple): Top-left corner of the HUD in pixels.
+
+        Returns:
+        - pygame.Rect: Rectangle of the window covered by the HUD.
+        """
+        if self._hud_surface is None or self.frames % HUD_REFRESH_FRAMES == 0:
+            self._hud_surface = self._render_hud(font)
+        return window.blit(self._hud_surface, position)
+
+    def close(self):
+        """
+        Close the export file.
+
+        Returns:
+        None
+        """
+        if self._export_file is not None:
+            self._export_file.close()
+            self._export_file, self._writer = None, None
@@ -0,0 +1,245 @@
+import glob
+import json
+import os
+from bisect import bisect_right
+import numpy as np
+
+"""
+Chunked on-disk trajectory recording and memory-mapped replay.
+
+A recording is a directory with:
+- index.json: Names and masses of the bodies, the number of frames per chunk and, for every
+  chunk, its files, number of frames and the simulated times of its first and last frame.
+- state_XXXXX.npy: (frames, N, 4) array with x, y, x_vel and y_vel of every body in every frame.
+- times_XXXXX.npy: (frames,) array with the simulated time of every frame in seconds.
+
+Chunks are written as soon as they are full, so a recording never has to fit in RAM, and
+the reader opens them with memory mapping, so seeking to any time only reads one frame.
+"""
+
+INDEX_FILE = 'index.json'
+CHUNK_PATTERNS = ('state_*.npy', 'times_*.npy')
+
+# Class Info
+"""
+Streams the state of an NBodySystem to a chunked recording.
+
+Attributes:
+- directory (str): Directory of the recording.
+- chunk_frames (int): Number of frames per chunk file.
+- frames (int): Number of frames recorded so far.
+
+Methods:
+- record: Appends the current state of the system as a frame.
+- flush: Writes the frames buffered so far to a new chunk.
+- close: Flushes the remaining frames.
+"""
+
+class TrajectoryRecorder:
+
+    def __init__(self, directory, names, masses, chunk_frames=4096, system=None):
+        """
+        Initialize a recording, replacing an existing recording in the directory.
+
+        Parameters:
+        - directory (str): Directory of the recording.
+        - names (list): Names of the bodies.
+        - masses (numpy.ndarray): Masses of the bodies in Kg.
+        - chunk_frames (int): Number of frames per chunk file.
+        - system (NBodySystem): System whose current state is recorded as the first frame, so that
+          the replay can seek back to the start (default is None, no initial frame).
+
+        Returns:
+        None
+        """
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.frames = 0
+        os.makedirs(directory, exist_ok=True)
+        # The chunks of a previous (possibly longer) recording must not be mixed with the new ones
+        for pattern in CHUNK_PATTERNS:
+            for path in glob.glob(os.path.join(glob.escape(directory), pattern)):
+                os.remove(path)
+        self._index = {
+            'names': list(names),
+            'masses': [float(mass) for mass in masses],
+            'chunk_frames': chunk_frames,
+            'chunks': [],
+        }
+        self._state = np.empty((chunk_frames, len(names), 4))
+        self._times = np.empty(chunk_frames)
+        self._buffered = 0
+        self._write_index()
+        if system is not None:
+            self.record(system)
+
+    def _write_index(self):
+        """
+        Atomically replace the index file of the recording.
+
+        Returns:
+        None
+        """
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self._index, file, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def record(self, system):
+        """
+        Append the current state of the system as a frame.
+
+        Parameters:
+        - system (NBodySystem): System of bodies (must have the bodies given to the recorder).
+
+        Returns:
+        None
+        """
+        frame = self._state[self._buffered]
+        frame[:, :2] = system.pos
+        frame[:, 2:] = system.vel
+        self._times[self._buffered] = system.time
+        self._buffered += 1
+        self.frames += 1
+        if self._buffered == self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the frames buffered so far to a new chunk and update the index.
+
+        Returns:
+        None
+        """
+        if self._buffered == 0:
+            return
+        number = len(self._index['chunks'])
+        chunk = {
+            'state_file': f'state_{number:05d}.npy',
+            'times_file': f'times_{number:05d}.npy',
+            'frames': self._buffered,
+            'start_time': float(self._times[0]),
+            'end_time': float(self._times[self._buffered - 1]),
+        }
+        np.save(os.path.join(self.directory, chunk['state_file']), self._state[:self._buffered])
+        np.save(os.path.join(self.directory, chunk['times_file']), self._times[:self._buffered])
+        self._index['chunks'].append(chunk)
+        self._write_index()
+        self._buffered = 0
+
+    def close(self):
+        """
+        Flush the remaining frames of the recording.
+
+        Returns:
+        None
+        """
+        self.flush()
+
+# Class Info
+"""
+Reads frames of a recording through memory-mapped arrays.
+
+Attributes:
+- names (list): Names of the bodies.
+- masses (numpy.ndarray): Masses of the bodies in Kg.
+- frames (int): Total number of frames.
+- start_time (float): Simulated time of the first frame in seconds.
+- end_time (float): Simulated time of the last frame in seconds.
+- time (float): Playback position in simulated seconds (used by the replay mode of the simulator).
+
+Methods:
+- frame: Returns the state of a frame by its number.
+- seek: Returns the number of the last frame at or before a given time.
+- apply: Copies a frame into the arrays of an NBodySystem.
+"""
+
+class TrajectoryReader:
+
+    def __init__(self, directory):
+        """
+        Open a recording.
+
+        Parameters:
+        - directory (str): Directory of the recording.
+
+        Returns:
+        None
+        """
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as file:
+            index = json.load(file)
+        self.names = index['names']
+        self.masses = np.array(index['masses'])
+        self._chunks = index['chunks']
+        if not self._chunks:
+            raise Exception(f'The recording in {directory} has no frames.')
+        self._first_frame = np.cumsum([0] + [chunk['frames'] for chunk in self._chunks])
+        self._start_times = [chunk['start_time'] for chunk in self._chunks]
+        self.frames = int(self._first_frame[-1])
+        self.start_time = self._chunks[0]['start_time']
+        self.end_time = self._chunks[-1]['end_time']
+        self.time = self.start_time
+        self._open = {}
+
+    def _chunk(self, number):
+        """
+        Return the memory-mapped state and times arrays of a chunk.
+
+        Parameters:
+        - number (int): Number of the chunk.
+
+        Returns:
+        Tuple[numpy.memmap, numpy.memmap]: State and times of the chunk.
+        """
+        if number not in self._open:
+            chunk = self._chunks[number]
+            self._open[number] = (
+                np.load(os.path.join(self.directory, chunk['state_file']), mmap_mode='r'),
+                np.load(os.path.join(self.directory, chunk['times_file']), mmap_mode='r'),
+            )
+        return self._open[number]
+
+    def frame(self, number):
+        """
+        Return the state of a frame.
+
+        Parameters:
+        - number (int): Number of the frame (0 to frames - 1).
+
+        Returns:
+        Tuple[float, numpy.ndarray]: Simulated time and (N, 4) array of x, y, x_vel, y_vel of the bodies.
+        """
+        chunk = bisect_right(self._first_frame, number) - 1
+        state, times = self._chunk(chunk)
+        offset = number - self._first_frame[chunk]
+        return float(times[offset]), state[offset]
+
+    def seek(self, time):
+        """
+        Find the last frame at or before a simulated time.
+
+        Parameters:
+        - time (float): Simulated time in seconds (clipped to the recording).
+
+        Returns:
+        - int: Number of the frame.
+        """
+        chunk = max(bisect_right(self._start_times, time) - 1, 0)
+        _, times = self._chunk(chunk)
+        offset = max(int(np.searchsorted(times, time, side='right')) - 1, 0)
+        return int(self._first_frame[chunk]) + offset
+
+    def apply(self, number, system):
+        """
+        Copy a frame into the arrays of an NBodySystem.
+
+        Parameters:
+        - number (int): Number of the frame.
+        - system (NBodySystem): System with the same bodies as the recording.
+
+        Returns:
+        None
+        """
+        time, state = self.frame(number)
+        system.set_state(state[:, :2], state[:, 2:], time)
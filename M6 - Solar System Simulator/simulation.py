@@ -1,7 +1,15 @@
+from time import perf_counter
 import pygame as pg
 from solar_system import SolarSystemBodies
-from stars import draw_stars
-from colors import BLACK_COLOR, WHITE_COLOR
+from physics import NBodySystem
+from stars import StarBackground
+from trails import TrailLayer
+from camera import Camera
+from catalog import load_catalog
+from profiler import FrameProfiler
+from colors import WHITE_COLOR
+from parameters import FORCE_SOLVER, BARNES_HUT_THETA, BARNES_HUT_MIN_BODIES, INTEGRATOR
+from parameters import SIMULATED_DAYS_PER_SECOND, MAX_SUBSTEPS_PER_FRAME, HUD_FONT_NAME, HUD_FONT_SIZE
 
 def get_screen_size():
     """
@@ -57,6 +65,10 @@ def set_simulation_fonts(body_font_name, body_font_size,
     return name_font, distance_font, pause_font
 
 
+_DISABLED_PROFILER = FrameProfiler(enabled=False, export_path=None)  # Used when no profiler is given
+
+solar_system = NBodySystem(solver=FORCE_SOLVER, theta=BARNES_HUT_THETA, integrator=INTEGRATOR,
+                           min_tree_bodies=BARNES_HUT_MIN_BODIES)  # Physics engine holding the state of all the solar system bodies
 solar_system_bodies = []  # List to store all the solar system bodies
 def add_solar_system_body(name, color, x, y, mass, radius, y_vel, sun=False):
     """
@@ -75,10 +87,175 @@ def add_solar_system_body(name, color, x, y, mass, radius, y_vel, sun=False):
     Returns:
     - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
     """
-    body = SolarSystemBodies(name, color, x, y, mass, radius, y_vel, sun)
+    body = SolarSystemBodies(name, color, x, y, mass, radius, y_vel, sun, system=solar_system)
     solar_system_bodies.append(body)
     return solar_system_bodies
 
+def load_body_catalog(path):
+    """
+    Add all the celestial bodies of a CSV/JSON catalog to the solar system (see catalog.py).
+
+    A body marked as the Sun in the catalog replaces the previous Sun, which becomes an ordinary body.
+
+    Parameters:
+    - path (str): Path of the catalog (.csv or .json).
+
+    Returns:
+    - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+    """
+    catalog_bodies = load_catalog(path, solar_system)
+    if any(body.sun for body in catalog_bodies):
+        for body in solar_system_bodies:
+            body.sun = False
+    solar_system_bodies.extend(catalog_bodies)
+    return solar_system_bodies
+
+def update_bodies(solar_system_bodies, track_orbit=True, recorder=None):
+    """
+    Advance all the celestial bodies by one time step in a single batched physics step.
+
+    Parameters:
+    - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+    - track_orbit (bool): Whether to append the new positions to the orbit paths (default is True).
+    - recorder (TrajectoryRecorder): Recorder to stream the new state to (default is None).
+
+    Returns:
+    None
+
+    Note:
+    - Bodies that are not exactly the bodies of one NBodySystem (e.g. built without `system=`)
+      are advanced one after the other with SolarSystemBodies.update_position instead.
+    """
+    if not solar_system_bodies:
+        return
+    system = SolarSystemBodies.shared_system(solar_system_bodies)
+    if system is None:
+        if recorder is not None:
+            raise Exception('Invalid bodies. A recording needs all the bodies in one NBodySystem. '
+                            f'Provided bodies: {len(solar_system_bodies)} bodies in '
+                            f'{len({id(body.system) for body in solar_system_bodies})} systems')
+        for body in solar_system_bodies:
+            body.update_position(solar_system_bodies, track_orbit)
+        return
+    system.step(SolarSystemBodies.TIME_STEP)
+    if recorder is not None:
+        recorder.record(system)
+    if track_orbit:
+        for body in solar_system_bodies:
+            body.track_position()
+
+def advance_physics(solar_system_bodies, accumulator, elapsed_time,
+                    days_per_second=SIMULATED_DAYS_PER_SECOND, max_substeps=MAX_SUBSTEPS_PER_FRAME, recorder=None,
+                    track_orbit=True):
+    """
+    Advance the physics with a fixed-timestep accumulator.
+
+    The real time elapsed since the last frame is converted to simulated time and added to the
+    accumulator, which is then consumed in substeps of exactly SolarSystemBodies.TIME_STEP.
+
+    Parameters:
+    - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+    - accumulator (float): Simulated time (in seconds) not yet consumed by previous frames.
+    - elapsed_time (float): Real time elapsed since the last frame in seconds.
+    - days_per_second (float): Simulated days advanced per real second.
+    - max_substeps (int): Upper limit of physics substeps in this frame.
+    - recorder (TrajectoryRecorder): Recorder to stream every substep to (default is None).
+    - track_orbit (bool): Whether to append the new positions to the orbit paths (default is True).
+
+    Returns:
+    Tuple[float, int]: Remaining accumulator and the number of substeps taken.
+
+    Note:
+    - When the limit of substeps is hit, the backlog is dropped so that a slow frame
+      does not make the next frames even slower.
+    """
+    time_step = SolarSystemBodies.TIME_STEP
+    accumulator += elapsed_time * days_per_second * 24*3600
+    steps = 0
+    while accumulator >= time_step and steps < max_substeps:
+        update_bodies(solar_system_bodies, track_orbit, recorder)
+        accumulator -= time_step
+        steps += 1
+    if steps == max_substeps:
+        accumulator = min(accumulator, time_step)
+    return accumulator, steps
+
+def advance_replay(solar_system_bodies, replay, elapsed_time, days_per_second=SIMULATED_DAYS_PER_SECOND,
+                   track_orbit=True):
+    """
+    Advance the playback of a recorded trajectory by the elapsed time.
+
+    Parameters:
+    - solar_system_bodies (list): List of SolarSystemBodies objects matching the bodies of the recording.
+    - replay (TrajectoryReader): Recording being replayed.
+    - elapsed_time (float): Real time elapsed since the last frame in seconds.
+    - days_per_second (float): Simulated days played per real second.
+    - track_orbit (bool): Whether to append the new positions to the orbit paths (default is True).
+
+    Returns:
+    None
+    """
+    replay.time = min(replay.time + elapsed_time * days_per_second * 24*3600, replay.end_time)
+    replay.apply(replay.seek(replay.time), solar_system_bodies[0].system)
+    if track_orbit:
+        for body in solar_system_bodies:
+            body.track_position()
+
+def seek_replay(event, replay):
+    """
+    Seek the playback of a recorded trajectory with the keyboard.
+
+    Keys: Left/Right move back/forward by 10% of the recording, Home/End go to the start/end.
+
+    Parameters:
+    - event (pygame.event.Event): Pygame event object.
+    - replay (TrajectoryReader): Recording being replayed.
+
+    Returns:
+    - bool: Whether the playback position changed.
+    """
+    if event.type != pg.KEYDOWN:
+        return False
+    jump = (replay.end_time - replay.start_time) / 10
+    targets = {
+        pg.K_LEFT: replay.time - jump,
+        pg.K_RIGHT: replay.time + jump,
+        pg.K_HOME: replay.start_time,
+        pg.K_END: replay.end_time,
+    }
+    if event.key not in targets:
+        return False
+    replay.time = min(max(targets[event.key], replay.start_time), replay.end_time)
+    return True
+
+def run_headless(solar_system_bodies, num_steps, track_orbit=False, recorder=None):
+    """
+    Run the integration of the celestial bodies without a window, fonts or pg.init().
+
+    Parameters:
+    - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+    - num_steps (int): Number of physics steps to run.
+    - track_orbit (bool): Whether to append the positions to the orbit paths (default is False).
+    - recorder (TrajectoryRecorder): Recorder to stream every step to (default is None).
+
+    Returns:
+    - dict: Summary of the run with the number of steps, simulated days, wall time, steps per second
+      and the relative energy error |E - E0| / |E0| at the end of the run.
+    """
+    system = solar_system_bodies[0].system
+    energy_0 = system.total_energy()
+    start = perf_counter()
+    for _ in range(num_steps):
+        update_bodies(solar_system_bodies, track_orbit, recorder)
+    wall_time = perf_counter() - start
+    return {
+        'steps': num_steps,
+        'simulated_days': num_steps * SolarSystemBodies.TIME_STEP / (24*3600),
+        'wall_time': wall_time,
+        'steps_per_second': num_steps / wall_time if wall_time > 0 else float('inf'),
+        'energy_error': abs(system.total_energy() - energy_0) / abs(energy_0),
+    }
+
 def simulate_bodies(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track_orbit=True):
     """
     Simulate the movement and draw the celestial bodies in the solar system.
@@ -96,9 +273,8 @@ def simulate_bodies(window, width, height, name_font, dist_font, pause_font, sol
     Returns:
     None
     """
-    for body in solar_system_bodies:
-        body.update_position(solar_system_bodies)
-        body.draw(window, width, height, name_font, dist_font, pause_font, track=track_orbit)
+    update_bodies(solar_system_bodies, track_orbit)
+    draw_bodies(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track_orbit)
 
 
 def draw_pause_text(window, width, pause_font, pad_text):
@@ -111,12 +287,12 @@ def draw_pause_text(window, width, pause_font, pad_text):
     - pad_text (int): Padding to Add on Pause text.
 
     Returns:
-    None
+    - pygame.Rect: Rectangle of the window covered by the pause text.
     """ 
     pause_text = pause_font.render('|| Pause',True, WHITE_COLOR)
     text_x = width - pause_text.get_width() - pad_text
     text_y = pad_text
-    window.blit(pause_text, (text_x, text_y))
+    return window.blit(pause_text, (text_x, text_y))
 
 def handle_events(event, run, paused):
     """
@@ -137,9 +313,13 @@ def handle_events(event, run, paused):
             paused = not paused
     return run, paused
 
-def simulate_and_update(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track, static_surface):
+def draw_bodies(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track_orbit=True,
+                camera=None):
     """
-    Simulate the movement and update the window.
+    Draw the celestial bodies in the solar system at their current positions.
+
+    With a camera, only the bodies inside its view are drawn (the culling is batched over all
+    the bodies, see Camera.visible_bodies).
 
     Parameters:
     - window (pygame.Surface): Pygame window surface.
@@ -147,39 +327,112 @@ def simulate_and_update(window, width, height, name_font, dist_font, pause_font,
     - height (int): Height of the Pygame window.
     - name_font (pygame.font.Font): Font for displaying celestial body names.
     - dist_font (pygame.font.Font): Font for displaying distance information.
-    - pause_font (pygame.font.Font): Font for displaying pause text.
+    - pause_font (pygame.font.Font): Font for displaying the pause text.
     - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
-    - track (bool): Whether to track the orbits of celestial bodies (default is True).
-    - static_surface (pygame.Surface): Surface to hold the static state.
+    - track_orbit (bool): Whether to track the orbits of celestial bodies (default is True).
+    - camera (Camera): View to draw with (default is the fixed view centered on the window).
 
     Returns:
-    None
+    - list: Rectangles (pygame.Rect) of the window that were drawn on.
     """
-    simulate_bodies(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track)
-    static_surface.blit(window, (0, 0))
-    pg.display.update()
+    if camera is not None:
+        solar_system_bodies = camera.visible_bodies(solar_system_bodies)
+    rects = []
+    for body in solar_system_bodies:
+        rects += body.draw(window, width, height, name_font, dist_font, pause_font, track=track_orbit, camera=camera)
+    return rects
 
-def display_paused_state(window, static_surface, width, height, pause_font):
+def restore_background(window, background, trail_layer, rects):
     """
-    Display the paused state.
+    Redraw the background (and the orbit trails) of the window inside the given rectangles.
+
+    Parameters:
+    - window (pygame.Surface): Pygame window surface.
+    - background (pygame.Surface): Background surface with the starfield.
+    - trail_layer (TrailLayer): Persistent surface for the orbit trails (None if not tracking).
+    - rects (list): Rectangles (pygame.Rect) to restore.
+
+    Returns:
+    None
+    """
+    for rect in rects:
+        window.blit(background, rect, rect)
+        if trail_layer is not None:
+            window.blit(trail_layer.surface, rect, rect)
+
+def simulate_and_update(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track,
+                        background, accumulator, elapsed_time, trail_layer=None, recorder=None, replay=None,
+                        camera=None, profiler=None):
+    """
+    Advance the physics by the elapsed time and draw the regions of the window that changed.
 
     Parameters:
     - window (pygame.Surface): Pygame window surface.
-    - static_surface (pygame.Surface): Surface containing the static state.
     - width (int): Width of the Pygame window.
     - height (int): Height of the Pygame window.
+    - name_font (pygame.font.Font): Font for displaying celestial body names.
+    - dist_font (pygame.font.Font): Font for displaying distance information.
+    - pause_font (pygame.font.Font): Font for displaying pause text.
+    - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+    - track (bool): Whether to track the orbits of celestial bodies (default is True).
+    - background (pygame.Surface): Background surface with the starfield.
+    - accumulator (float): Simulated time (in seconds) not yet consumed by previous frames.
+    - elapsed_time (float): Real time elapsed since the last frame in seconds.
+    - trail_layer (TrailLayer): Persistent surface for the orbit trails (default is None).
+    - recorder (TrajectoryRecorder): Recorder to stream every physics step to (default is None).
+    - replay (TrajectoryReader): Recording to play back instead of running the physics (default is None).
+    - camera (Camera): View to draw with (default is the fixed view centered on the window).
+    - profiler (FrameProfiler): Profiler timing the phases of the frame (default is None).
 
     Returns:
-    None
+    Tuple[float, list]: Simulated time left over for the next frame and the rectangles drawn on.
+
+    Note:
+    - The bodies of the previous frame must already be erased (see restore_background).
+    """
+    profiler = profiler if profiler is not None else _DISABLED_PROFILER
+    with profiler.phase('physics'):
+        if replay is not None:
+            advance_replay(solar_system_bodies, replay, elapsed_time, track_orbit=track)
+        else:
+            accumulator, steps = advance_physics(solar_system_bodies, accumulator, elapsed_time, recorder=recorder,
+                                                 track_orbit=track)
+            profiler.count_steps(steps)
+    rects = []
+    if track and trail_layer is not None:
+        with profiler.phase('trails'):
+            rects = trail_layer.update(solar_system_bodies)
+            restore_background(window, background, trail_layer, rects)
+        track = False
+    with profiler.phase('bodies'):
+        rects += draw_bodies(window, width, height, name_font, dist_font, pause_font, solar_system_bodies, track,
+                             camera)
+    return accumulator, rects
+
+def display_paused_state(window, width, pause_font):
+    """
+    Display the paused state on top of the last frame, which is still on the window.
+
+    Parameters:
+    - window (pygame.Surface): Pygame window surface.
+    - width (int): Width of the Pygame window.
+    - pause_font (pygame.font.Font): Font for displaying pause text.
+
+    Returns:
+    - list: Rectangles (pygame.Rect) of the window that were drawn on.
     """
-    window.blit(static_surface, (0, 0))
-    draw_pause_text(window, width, pause_font, 50)
-    pg.display.update()
+    return [draw_pause_text(window, width, pause_font, 50)]
 
-def simulator(simulation_fps, window, width, height, name_font, dist_font, pause_font, stars_list, track):
+def simulator(simulation_fps, window, width, height, name_font, dist_font, pause_font, stars_list, track,
+              recorder=None, replay=None):
     """
     Run the solar system simulation.
 
+    Only the regions of the window that changed (bodies, labels, new trail segments and the
+    pause text) are redrawn and they are sent to the display in a single update per frame.
+    The view can be zoomed and panned with the mouse or keyboard (see Camera) and the
+    performance HUD is toggled with 'H' (see FrameProfiler).
+
     Parameters:
     - simulation_fps (int): Frames per second for the simulation.
     - window (pygame.Surface): Pygame window surface.
@@ -190,6 +443,9 @@ def simulator(simulation_fps, window, width, height, name_font, dist_font, pause
     - pause_font (pygame.font.Font): Font for displaying pause text on simulator.
     - stars_list (list): List of star coordinates for the background.
     - track (bool): Whether to track the orbits of celestial bodies.
+    - recorder (TrajectoryRecorder): Recorder to stream every physics step to (default is None).
+    - replay (TrajectoryReader): Recording to play back instead of running the physics (default is None).
+      Use Left/Right/Home/End to seek.
 
     Returns:
     None
@@ -198,21 +454,73 @@ def simulator(simulation_fps, window, width, height, name_font, dist_font, pause
     run = True
     paused = False
     clock = pg.time.Clock()
+    accumulator = 0
 
-    static_surface = pg.Surface((width, height))
+    camera = Camera(width, height, SolarSystemBodies.SCALE)
+    trail_layer = TrailLayer(width, height, camera) if track else None
+    background = StarBackground(stars_list, width, height)
+    shown_background = None    # Background currently on the window
+    drawn_rects = []           # Regions drawn over the background in the previous frame
+    pause_shown = False
+    profiler = FrameProfiler()
+    hud_font = pg.font.SysFont(name=HUD_FONT_NAME, size=HUD_FONT_SIZE, bold=True)
 
     while run:
-        clock.tick(simulation_fps)
-        window.fill(BLACK_COLOR)
-        draw_stars(window, stars_list)
-
-        for event in pg.event.get():
-            run, paused = handle_events(event, run, paused)
+        elapsed_time = clock.tick(simulation_fps) / 1000
+
+        with profiler.phase('events'):
+            for event in pg.event.get():
+                run, paused = handle_events(event, run, paused)
+                if event.type in (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED) or profiler.handle_event(event):
+                    shown_background = None
+                if camera.handle_event(event):
+                    shown_background = None
+                    if trail_layer is not None:
+                        trail_layer.invalidate()
+                if replay is not None and seek_replay(event, replay) and track:
+                    for body in solar_system_bodies:
+                        body.orbit.clear()
+                    trail_layer.invalidate()
+
+        # Redraw the whole window only when it is new, resized, was exposed or the camera moved
+        dirty_rects = []
+        with profiler.phase('background'):
+            current_background = background.get(*window.get_size())
+            if current_background is not shown_background:
+                shown_background = current_background
+                if trail_layer is not None:
+                    trail_layer.update(solar_system_bodies)
+                restore_background(window, current_background, trail_layer, [window.get_rect()])
+                dirty_rects.append(window.get_rect())
+                drawn_rects = []
+                pause_shown = False
 
         if not paused:
-            simulate_and_update(window, width, height, name_font, dist_font, pause_font, \
-                                solar_system_bodies, track, static_surface)
-        else:
-            display_paused_state(window, static_surface, width, height, pause_font)
-
-        pg.display.update()
\ No newline at end of file
+            with profiler.phase('background'):
+                restore_background(window, current_background, trail_layer, drawn_rects)
+            dirty_rects += drawn_rects
+            accumulator, drawn_rects = simulate_and_update(window, width, height, name_font, dist_font, pause_font, \
+                                                           solar_system_bodies, track, current_background, accumulator,
+                                                           elapsed_time, trail_layer, recorder, replay, camera, profiler)
+            if profiler.show_hud:
+                with profiler.phase('hud'):
+                    drawn_rects.append(profiler.draw_hud(window, hud_font))
+            dirty_rects += drawn_rects
+            pause_shown = False
+        elif not pause_shown:
+            if not drawn_rects:
+                drawn_rects = draw_bodies(window, width, height, name_font, dist_font, pause_font,
+                                          solar_system_bodies, track_orbit=False, camera=camera)
+                if profiler.show_hud:
+                    drawn_rects.append(profiler.draw_hud(window, hud_font))
+            pause_rects = display_paused_state(window, width, pause_font)
+            drawn_rects += pause_rects
+            dirty_rects += drawn_rects
+            pause_shown = True
+
+        if dirty_rects:
+            with profiler.phase('flip'):
+                pg.display.update(dirty_rects)
+        profiler.end_frame(record=not paused)
+
+    profiler.close()
@@ -1,5 +1,8 @@
 from colors import NAME_TEXT_COLOR, DIST_TEXT_COLOR, SUN_NAME_COLOR, SUN_TEXT_COLOR
 from parameters import SIMULATION_SCALE
+from physics import NBodySystem
+from trails import OrbitTrail
+from labels import LabelCache
 import pygame as pg
 import math
 
@@ -12,27 +15,37 @@ Class Attributes:
 - SCALE (float): Simulation scale factor.
 - G (float): Gravitational constant.
 - TIME_STEP (float): Time step for simulation updates.
+- LABELS (LabelCache): Cache of the rendered name and distance labels.
 
 Attributes:
 - name (str): Name of the celestial body.
 - color (tuple): RGB tuple representing the color of the celestial body.
-- x (float): Current x-coordinate of the celestial body.
-- y (float): Current y-coordinate of the celestial body.
-- mass (float): Mass of the celestial body.
+- system (NBodySystem): Physics engine holding the state of the celestial body.
+- index (int): Index of the celestial body in the arrays of the system.
+- x (float): Current x-coordinate of the celestial body (view into system.pos).
+- y (float): Current y-coordinate of the celestial body (view into system.pos).
+- mass (float): Mass of the celestial body (view into system.mass).
 - simulator_radius (float): Radius of the celestial body in the simulator.
 - sun (bool): Indicates whether the celestial body is the Sun (default is False).
-- distance_to_sun (float): Distance to the Sun (used for tracking orbit).
-- x_vel (float): Current x-component of velocity.
-- y_vel (float): Current y-component of velocity.
-- orbit (list): List of positions representing the orbit path.
+- distance_to_sun (float): Distance to the Sun (view into system.distance_to_sun).
+- x_vel (float): Current x-component of velocity (view into system.vel).
+- y_vel (float): Current y-component of velocity (view into system.vel).
+- orbit (OrbitTrail): Ring buffer of positions representing the orbit path (allocated on first use).
+- has_orbit (bool): Whether the orbit path has been allocated (reading it does not allocate it).
+
+The attributes are stored in __slots__ (no per-instance __dict__) and the state lives in
+the arrays of the NBodySystem, so scenes with 100k bodies stay small.
 
 Methods:
 - __init__: Initializes a celestial body with specified parameters.
+- from_system: Wraps a body that is already in an NBodySystem (see catalog.py).
+- shared_system: Returns the NBodySystem holding exactly the given bodies (None if there is none).
 - _draw_body: Draws the celestial body on the Pygame window.
 - _track_orbit: Draws the orbit path of the celestial body.
 - draw: Combines _draw_body and _track_orbit for display.
 - _gravitational_force: Calculates gravitational force between two celestial bodies.
 - update_position: Updates the position of the celestial body based on gravitational forces.
+- track_position: Appends the current position to the orbit path.
 
 """
 
@@ -41,10 +54,13 @@ class SolarSystemBodies:
 
     AU = 1.496e11
     SCALE = SIMULATION_SCALE/AU
-    G = 6.6743e-11
+    G = NBodySystem.G
     TIME_STEP = 24*3600
+    LABELS = LabelCache()
+
+    __slots__ = ('name', 'color', 'simulator_radius', 'sun', 'system', 'index', '_orbit')
 
-    def __init__(self, name, color, x, y, mass, simulator_radius, y_vel, sun=False):
+    def __init__(self, name, color, x, y, mass, simulator_radius, y_vel, sun=False, system=None):
         """
         Initialize a celestial body with specified parameters.
 
@@ -57,25 +73,121 @@ class SolarSystemBodies:
         - simulator_radius (float): Radius of the celestial body in the simulator.
         - y_vel (float): Initial vertical velocity of the celestial body.
         - sun (bool): Whether the celestial body is the Sun (default is False).
+        - system (NBodySystem): Physics engine to store the body in (default is a new one).
 
         Returns:
         None
         """
         self.name = name
         self.color = color
-        self.x = x*self.AU
-        self.y = y
-        self.mass = mass
         self.simulator_radius = simulator_radius
-
         self.sun = sun
-        self.distance_to_sun = 0
 
-        self.x_vel = 0
-        self.y_vel = y_vel
-        self.orbit = []
+        self.system = system if system is not None else NBodySystem()
+        self.index = self.system.add_body(x*self.AU, y, mass, 0, y_vel, sun)
+        self._orbit = None
+
+    @classmethod
+    def from_system(cls, system, index, name, color, simulator_radius, sun=False):
+        """
+        Wrap a celestial body that is already stored in an NBodySystem.
+
+        Parameters:
+        - system (NBodySystem): Physics engine holding the state of the celestial body.
+        - index (int): Index of the celestial body in the arrays of the system.
+        - name (str): Name of the celestial body.
+        - color (tuple): RGB tuple representing the color of the celestial body.
+        - simulator_radius (float): Radius of the celestial body in the simulator.
+        - sun (bool): Whether the celestial body is the Sun (default is False).
+
+        Returns:
+        - SolarSystemBodies: The celestial body.
+        """
+        body = cls.__new__(cls)
+        body.name = name
+        body.color = color
+        body.simulator_radius = simulator_radius
+        body.sun = sun
+        body.system = system
+        body.index = index
+        body._orbit = None
+        return body
+
+    @staticmethod
+    def shared_system(solar_system_bodies):
+        """
+        Find the NBodySystem that holds exactly the given celestial bodies.
+
+        Parameters:
+        - solar_system_bodies (list): List of SolarSystemBodies objects.
 
-    def _draw_body(self, WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT):
+        Returns:
+        - NBodySystem: The system of the bodies, or None if they are spread over several systems
+          or the system holds other bodies too (e.g. bodies built without `system=`).
+        """
+        if not solar_system_bodies:
+            return None
+        system = solar_system_bodies[0].system
+        if len(solar_system_bodies) != system.size or any(body.system is not system for body in solar_system_bodies):
+            return None
+        return system
+
+    @property
+    def orbit(self):
+        if self._orbit is None:
+            self._orbit = OrbitTrail()
+        return self._orbit
+
+    @property
+    def has_orbit(self):
+        return self._orbit is not None
+
+    # Views into the arrays of the physics engine
+    @property
+    def x(self):
+        return float(self.system.pos[self.index, 0])
+
+    @x.setter
+    def x(self, value):
+        self.system.pos[self.index, 0] = value
+
+    @property
+    def y(self):
+        return float(self.system.pos[self.index, 1])
+
+    @y.setter
+    def y(self, value):
+        self.system.pos[self.index, 1] = value
+
+    @property
+    def x_vel(self):
+        return float(self.system.vel[self.index, 0])
+
+    @x_vel.setter
+    def x_vel(self, value):
+        self.system.vel[self.index, 0] = value
+
+    @property
+    def y_vel(self):
+        return float(self.system.vel[self.index, 1])
+
+    @y_vel.setter
+    def y_vel(self, value):
+        self.system.vel[self.index, 1] = value
+
+    @property
+    def mass(self):
+        return float(self.system.mass[self.index])
+
+    @mass.setter
+    def mass(self, value):
+        self.system.mass[self.index] = value
+
+    @property
+    def distance_to_sun(self):
+        return float(self.system.distance_to_sun[self.index])
+
+    def _draw_body(self, WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT, camera=None):
         """
         Draws the celestial body on the Pygame window.
 
@@ -85,26 +197,37 @@ class SolarSystemBodies:
         - HEIGHT (int): Height of the Pygame window.
         - NAME_FONT (pygame.font.Font): Font for displaying celestial body names.
         - DIST_FONT (pygame.font.Font): Font for displaying distance information.
+        - camera (Camera): View to draw with (default is the fixed view centered on the window).
 
         Returns:
-        None
+        - list: Rectangles (pygame.Rect) of the window that were drawn on.
         """
-        x = self.x*self.SCALE + WIDTH//2
-        y = self.y*self.SCALE + HEIGHT//2
-        pg.draw.circle(surface=WINDOW, color=self.color, center=(x, y), radius=self.simulator_radius)
+        if camera is None:
+            x = self.x*self.SCALE + WIDTH//2
+            y = self.y*self.SCALE + HEIGHT//2
+            radius = self.simulator_radius
+        else:
+            x, y = camera.to_screen((self.x, self.y)).tolist()
+            radius = camera.draw_radius(self.simulator_radius)
+            # Tiny bodies are single pixels without labels
+            if not radius:
+                WINDOW.set_at((int(x), int(y)), self.color)
+                return [pg.Rect(int(x), int(y), 1, 1)]
+        rects = [pg.draw.circle(surface=WINDOW, color=self.color, center=(x, y), radius=radius)]
 
         if not self.sun:
-            name_text = NAME_FONT.render(self.name, True, NAME_TEXT_COLOR)
-            WINDOW.blit(name_text, (x-40, y-55))
-            dist_text = DIST_FONT.render(f"{round(self.distance_to_sun/(3e8*60), 3)} lt-min", True, DIST_TEXT_COLOR)
-            WINDOW.blit(dist_text, (x-40, y-35))
+            name_text = self.LABELS.name(NAME_FONT, self.name, NAME_TEXT_COLOR)
+            rects.append(WINDOW.blit(name_text, (x-40, y-55)))
+            dist_text = self.LABELS.distance(DIST_FONT, f"{round(self.distance_to_sun/(3e8*60), 3)} lt-min", DIST_TEXT_COLOR)
+            rects.append(WINDOW.blit(dist_text, (x-40, y-35)))
         else:
-            name_text = NAME_FONT.render(self.name, True, SUN_NAME_COLOR)
-            WINDOW.blit(name_text, (x-40, y-78))
-            dist_text = DIST_FONT.render(f"{round(self.x/3e8, 3), round(self.y/3e8, 3)} lt-sec", True, SUN_TEXT_COLOR)
-            WINDOW.blit(dist_text, (x-40, y-55))
+            name_text = self.LABELS.name(NAME_FONT, self.name, SUN_NAME_COLOR)
+            rects.append(WINDOW.blit(name_text, (x-40, y-78)))
+            dist_text = self.LABELS.distance(DIST_FONT, f"{round(self.x/3e8, 3), round(self.y/3e8, 3)} lt-sec", SUN_TEXT_COLOR)
+            rects.append(WINDOW.blit(dist_text, (x-40, y-55)))
+        return rects
 
-    def _track_orbit(self, WINDOW, WIDTH, HEIGHT):
+    def _track_orbit(self, WINDOW, WIDTH, HEIGHT, camera=None):
         """
         Draws the orbit path of the celestial body on the Pygame window.
 
@@ -112,19 +235,24 @@ class SolarSystemBodies:
         - WINDOW (pygame.Surface): Pygame window surface.
         - WIDTH (int): Width of the Pygame window.
         - HEIGHT (int): Height of the Pygame window.
+        - camera (Camera): View to draw with, only the parts of the path inside it are drawn
+          (default is the fixed view centered on the window).
 
         Returns:
-        None
+        - list: Rectangles (pygame.Rect) of the window that were drawn on.
         """
+        # A body whose position was never tracked has no orbit path to draw
+        if not self.has_orbit:
+            return []
+        if camera is not None:
+            return [pg.draw.lines(surface=WINDOW, color=self.color, closed=False, points=points.tolist(), width=2)
+                    for points in camera.visible_runs(self.orbit.points())]
         if len(self.orbit) > 1:
-            centered_points = []
-            for (x, y) in self.orbit:
-                x = x*self.SCALE + WIDTH//2
-                y = y*self.SCALE + HEIGHT//2
-                centered_points.append((x, y))
-            pg.draw.lines(surface=WINDOW, color=self.color, closed=False, points=centered_points, width=2)
+            centered_points = self.orbit.points()*self.SCALE + (WIDTH//2, HEIGHT//2)
+            return [pg.draw.lines(surface=WINDOW, color=self.color, closed=False, points=centered_points.tolist(), width=2)]
+        return []
 
-    def draw(self, WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT, PAUSE_FONT, track=True):
+    def draw(self, WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT, PAUSE_FONT, track=True, camera=None):
         """
         Combines _draw_body and _track_orbit for display.
 
@@ -136,13 +264,15 @@ class SolarSystemBodies:
         - DIST_FONT (pygame.font.Font): Font for displaying distance information.
         - PAUSE_FONT (pygame.font.Font): Font for displaying the pause text.
         - track (bool): Whether to track the orbits of celestial bodies (default is True).
+        - camera (Camera): View to draw with (default is the fixed view centered on the window).
 
         Returns:
-        None
+        - list: Rectangles (pygame.Rect) of the window that were drawn on.
         """
-        self._draw_body(WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT)
+        rects = self._draw_body(WINDOW, WIDTH, HEIGHT, NAME_FONT, DIST_FONT, camera)
         if track:
-            self._track_orbit(WINDOW, WIDTH, HEIGHT)
+            rects += self._track_orbit(WINDOW, WIDTH, HEIGHT, camera)
+        return rects
 
     def _gravitational_force(self, solar_system_body):
         """
@@ -156,33 +286,52 @@ class SolarSystemBodies:
         """
         x_diff = solar_system_body.x - self.x
         y_diff = solar_system_body.y - self.y
-        distance = math.sqrt(x_diff**2 + y_diff**2)
-        if solar_system_body.sun:
-            self.distance_to_sun = distance
-        g_force = self.G * self.mass * solar_system_body.mass / distance**2
-        theta = math.atan2(y_diff, x_diff)
-        f_x = g_force * math.cos(theta)
-        f_y = g_force * math.sin(theta)
-        return f_x, f_y
+        distance_sq = x_diff**2 + y_diff**2
+        g_force = self.G * self.mass * solar_system_body.mass / (distance_sq * distance_sq**0.5)
+        return g_force * x_diff, g_force * y_diff
 
-    def update_position(self, solar_system_bodies):
+    def update_position(self, solar_system_bodies, track_orbit=True):
         """
         Updates the position of the celestial body based on gravitational forces.
 
+        Only this body moves; the forces come from every other body in solar_system_bodies.
+        To advance all the bodies together use NBodySystem.step instead.
+
         Parameters:
         - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+        - track_orbit (bool): Whether to append the new position to the orbit path (default is True).
+
+        Returns:
+        None
+
+        Note:
+        - When the bodies are exactly the bodies of one NBodySystem the forces are computed by
+          NBodySystem.update_body, otherwise (e.g. bodies built without `system=`) they are summed
+          over the list one pair at a time.
+        """
+        if self.shared_system(solar_system_bodies) is self.system:
+            self.system.update_body(self.index, self.TIME_STEP)
+        else:
+            net_fx, net_fy = 0, 0
+            for body in solar_system_bodies:
+                if body is not self:
+                    f_x, f_y = self._gravitational_force(body)
+                    net_fx += f_x
+                    net_fy += f_y
+                    if body.sun:
+                        self.system.distance_to_sun[self.index] = math.hypot(body.x - self.x, body.y - self.y)
+            self.x_vel += net_fx / self.mass * self.TIME_STEP
+            self.y_vel += net_fy / self.mass * self.TIME_STEP
+            self.x += self.x_vel * self.TIME_STEP
+            self.y += self.y_vel * self.TIME_STEP
+        if track_orbit:
+            self.track_position()
+
+    def track_position(self):
+        """
+        Appends the current position of the celestial body to the orbit path.
 
         Returns:
         None
         """
-        net_fx, net_fy = 0, 0
-        for body in solar_system_bodies:
-            if self != body:
-                f_x, f_y = self._gravitational_force(body)
-                net_fx += f_x
-                net_fy += f_y
-        self.x_vel += net_fx / self.mass * self.TIME_STEP
-        self.y_vel += net_fy / self.mass * self.TIME_STEP
-        self.x += self.x_vel * self.TIME_STEP
-        self.y += self.y_vel * self.TIME_STEP
-        self.orbit.append((self.x, self.y))
\ No newline at end of file
+        self.orbit.append(self.x, self.y)
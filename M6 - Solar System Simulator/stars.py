@@ -1,5 +1,6 @@
 from random import randint
 import pygame as pg
+from colors import BLACK_COLOR
 
 def generate_stars(num_stars, width, height):
     """
@@ -36,4 +37,70 @@ def draw_stars(WINDOW, stars_list):
     None
     """
     for star in stars_list:
-        pg.draw.circle(WINDOW, star['color'], star['center'], star['radius'])
\ No newline at end of file
+        pg.draw.circle(WINDOW, star['color'], star['center'], star['radius'])
+
+# Class Info
+"""
+Background layer with the starfield composited once into a cached surface.
+
+The stars never change, so they are drawn onto the background only when it is
+created or when the window is resized, and every frame just blits it in one call.
+
+Attributes:
+- num_stars (int): Number of stars in the background.
+- stars_list (list): List of star dictionaries drawn on the background.
+
+Methods:
+- get: Returns the background surface for a given window size.
+"""
+
+class StarBackground:
+
+    def __init__(self, stars_list, width, height):
+        """
+        Initialize the background with an existing list of stars.
+
+        Parameters:
+        - stars_list (list): List of star dictionaries, each containing color, center coordinates, and radius.
+        - width (int): Width of the Pygame window the stars were generated for.
+        - height (int): Height of the Pygame window the stars were generated for.
+
+        Returns:
+        None
+        """
+        self.num_stars = len(stars_list)
+        self.stars_list = stars_list
+        self._size = (width, height)
+        self._surface = None
+
+    def _render(self):
+        """
+        Composite the stars onto a new background surface.
+
+        Returns:
+        None
+        """
+        self._surface = pg.Surface(self._size)
+        if pg.display.get_surface() is not None:
+            self._surface = self._surface.convert()
+        self._surface.fill(BLACK_COLOR)
+        draw_stars(self._surface, self.stars_list)
+
+    def get(self, width, height):
+        """
+        Return the background surface, regenerating the stars only when the size has changed.
+
+        Parameters:
+        - width (int): Width of the Pygame window.
+        - height (int): Height of the Pygame window.
+
+        Returns:
+        - pygame.Surface: Background surface with the starfield.
+        """
+        if (width, height) != self._size:
+            self._size = (width, height)
+            self.stars_list = generate_stars(self.num_stars, width, height)
+            self._surface = None
+        if self._surface is None:
+            self._render()
+        return self._surface
@@ -0,0 +1,211 @@
+import numpy as np
+import pygame as pg
+from colors import BLACK_COLOR
+from parameters import TRAIL_LENGTH, TRAIL_DECIMATION
+
+# Class Info
+"""
+Fixed-capacity ring buffer holding the orbit path of a celestial body.
+
+Attributes:
+- capacity (int): Maximum number of points kept in the trail.
+- decimation (int): Only every `decimation`-th position is stored.
+- appended (int): Total number of points stored since the trail was created.
+
+Methods:
+- append: Stores a position (subject to decimation), overwriting the oldest point when full.
+- points: Returns the stored points from the oldest to the newest.
+- latest: Returns the newest points.
+- clear: Removes all the points.
+"""
+
+class OrbitTrail:
+
+    __slots__ = ('capacity', 'decimation', 'appended', '_points', '_skipped')
+
+    def __init__(self, capacity=TRAIL_LENGTH, decimation=TRAIL_DECIMATION):
+        """
+        Initialize an empty trail.
+
+        Parameters:
+        - capacity (int): Maximum number of points kept in the trail.
+        - decimation (int): Only every `decimation`-th position is stored (default is every position).
+
+        Returns:
+        None
+        """
+        self.capacity = capacity
+        self.decimation = max(1, decimation)
+        self.appended = 0
+        self._points = np.empty((capacity, 2))
+        self._skipped = 0
+
+    def __len__(self):
+        return min(self.appended, self.capacity)
+
+    def append(self, x, y):
+        """
+        Store a position in the trail, overwriting the oldest point when the trail is full.
+
+        Parameters:
+        - x (float): x-coordinate of the position.
+        - y (float): y-coordinate of the position.
+
+        Returns:
+        - bool: Whether the position was stored (False when it was skipped by the decimation).
+        """
+        self._skipped += 1
+        if self._skipped < self.decimation:
+            return False
+        self._skipped = 0
+        self._points[self.appended % self.capacity] = x, y
+        self.appended += 1
+        return True
+
+    def latest(self, n):
+        """
+        Return the newest points of the trail.
+
+        Parameters:
+        - n (int): Number of points to return (at most the length of the trail).
+
+        Returns:
+        - numpy.ndarray: (n, 2) array of points from the oldest to the newest.
+        """
+        n = min(n, len(self))
+        indices = np.arange(self.appended - n, self.appended) % self.capacity
+        return self._points[indices]
+
+    def points(self):
+        """
+        Return all the points of the trail.
+
+        Returns:
+        - numpy.ndarray: (len, 2) array of points from the oldest to the newest.
+        """
+        return self.latest(len(self))
+
+    def clear(self):
+        """
+        Remove all the points from the trail.
+
+        Returns:
+        None
+        """
+        self.appended = 0
+        self._skipped = 0
+
+# Class Info
+"""
+Persistent surface onto which the orbit trails are drawn incrementally.
+
+Every frame only the segments added since the previous frame are drawn, and only the
+parts of them inside the view of the camera. Bodies without an orbit path (has_orbit is False)
+are skipped, so drawing never allocates a trail. Once a
+trail has wrapped around its ring buffer, the surface is cleared and redrawn from
+the ring buffers every quarter of the trail length, so that the trails on screen
+stay bounded (at most 1.25 times TRAIL_LENGTH points).
+
+Attributes:
+- surface (pygame.Surface): Surface holding the trails (BLACK_COLOR is transparent).
+
+Methods:
+- update: Draws the new segments of every trail and returns the changed rectangles.
+- redraw: Clears the surface and draws every trail from its ring buffer.
+- invalidate: Forces a full redraw on the next update (e.g. when the camera moves).
+"""
+
+class TrailLayer:
+
+    def __init__(self, width, height, camera, line_width=2):
+        """
+        Initialize an empty trail layer.
+
+        Parameters:
+        - width (int): Width of the Pygame window.
+        - height (int): Height of the Pygame window.
+        - camera (Camera): View to draw the trails with.
+        - line_width (int): Width of the trail lines in pixels.
+
+        Returns:
+        None
+        """
+        self.surface = pg.Surface((width, height))
+        self.surface.set_colorkey(BLACK_COLOR)
+        self.surface.fill(BLACK_COLOR)
+        self.camera = camera
+        self.line_width = line_width
+        self._drawn = {}        # Points of every trail already on the surface
+        self._refreshed = {}    # Points of every trail at the last full redraw
+        self._valid = False
+
+    def _draw(self, color, points):
+        """
+        Draw the parts of a polyline that are inside the view of the camera.
+
+        Parameters:
+        - color (tuple): RGB tuple of the line.
+        - points (numpy.ndarray): (N, 2) array of points in metres.
+
+        Returns:
+        - list: Rectangles (pygame.Rect) of the surface that changed.
+        """
+        return [pg.draw.lines(self.surface, color, False, run.tolist(), self.line_width)
+                for run in self.camera.visible_runs(points, self.line_width)]
+
+    def invalidate(self):
+        """
+        Force a full redraw on the next update.
+
+        Returns:
+        None
+        """
+        self._valid = False
+
+    def redraw(self, solar_system_bodies):
+        """
+        Clear the surface and draw every trail from its ring buffer.
+
+        Parameters:
+        - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+
+        Returns:
+        None
+        """
+        self.surface.fill(BLACK_COLOR)
+        for body in solar_system_bodies:
+            if not body.has_orbit:
+                continue
+            trail = body.orbit
+            self._draw(body.color, trail.points())
+            self._drawn[body] = self._refreshed[body] = trail.appended
+        self._valid = True
+
+    def update(self, solar_system_bodies):
+        """
+        Draw the segments added to every trail since the previous update.
+
+        Parameters:
+        - solar_system_bodies (list): List of SolarSystemBodies objects representing the solar system bodies.
+
+        Returns:
+        - list: Rectangles (pygame.Rect) of the surface that changed.
+        """
+        solar_system_bodies = [body for body in solar_system_bodies if body.has_orbit]
+        refresh_needed = not self._valid or any(
+            body.orbit.appended > body.orbit.capacity and
+            body.orbit.appended - self._refreshed.get(body, 0) >= max(1, body.orbit.capacity//4)
+            for body in solar_system_bodies
+        )
+        if refresh_needed:
+            self.redraw(solar_system_bodies)
+            return [self.surface.get_rect()]
+
+        rects = []
+        for body in solar_system_bodies:
+            trail = body.orbit
+            new_points = trail.appended - self._drawn.get(body, 0)
+            if new_points > 0 and len(trail) > 1:
+                rects += self._draw(body.color, trail.latest(new_points + 1))
+            self._drawn[body] = trail.appended
+        return rects
@@ -1,15 +1,78 @@
 # Standard Imports
-from fastapi import FastAPI
+import os
+import json
+from contextlib import asynccontextmanager
+from typing import List
+from fastapi import FastAPI, Body, Response
 import numpy as np
 
 # Local Imports
 from star_data import StarProperties, StarTypePrediction
-from predictor import load_model, make_predictions
+from predictor import load_model, load_inference_engine, make_batch_predictions, attach_engine, SHARED_MODEL_ENV
+from cache import PredictionCache
+from batcher import MicroBatcher
 
-# Creating a FastAPI app instance and loading a machine learning model from MODEL_PATH
-app = FastAPI()
+# Loading a machine learning model from MODEL_PATH (served by its NumPy inference engine when it
+# passes the parity check), or attaching to the engine shared by serve.py with the other workers
 MODEL_PATH = 'model.pkl'
-model = load_model(MODEL_PATH)
+if os.environ.get(SHARED_MODEL_ENV):
+    model = attach_engine(json.loads(os.environ[SHARED_MODEL_ENV]))
+else:
+    model = load_inference_engine(load_model(MODEL_PATH))
+
+# Star sent through the model at startup, the app reports being ready only after this warm-up
+WARMUP_FEATURES = [2376, 0.00073, 0.127, 17.22]
+ready = False
+
+# Maximum number of stars accepted by /predict/batch in one request
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# Cache of the predictions of the current model (memory bound in bytes, 0 disables it, and time to live in seconds)
+prediction_cache = PredictionCache(max_bytes=int(os.environ.get('CACHE_MAX_BYTES', 16*1024*1024)),
+                                   ttl=float(os.environ.get('CACHE_TTL', 3600)))
+
+# Concurrent /predict requests are combined into one model call: the requests arriving within
+# BATCH_WINDOW_MS milliseconds of the first one, up to BATCH_MAX_SIZE requests
+batcher = MicroBatcher(lambda input_features: make_batch_predictions(model, input_features),
+                       window=float(os.environ.get('BATCH_WINDOW_MS', 2)) / 1000,
+                       max_size=int(os.environ.get('BATCH_MAX_SIZE', 64)))
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm up the prediction path (model and micro-batching worker) before serving requests."""
+    global ready
+    await batcher.submit(WARMUP_FEATURES)
+    ready = True
+    yield
+
+# Creating a FastAPI app instance
+app = FastAPI(lifespan=lifespan)
+
+def reload_model():
+    """Load MODEL_PATH again and invalidate the cached predictions of the previous model."""
+    global model
+    model = load_inference_engine(load_model(MODEL_PATH))
+    prediction_cache.clear()
+
+def format_prediction(predicted_class, probs, classes):
+    """Build the response of a single star from its predicted class and probabilities.
+
+    Parameters:
+        predicted_class (str): The predicted star class.
+        probs (List[float]): The predicted probabilities, in the order of classes.
+        classes (List[str]): The classes of the model.
+
+    Returns:
+        dict: A dictionary containing the predicted probabilities for each star type (sorted),
+              the predicted star class, and the confidence score.
+    """
+    pred_probs = dict(zip(classes, probs))
+    sorted_pred_probs = dict(sorted(pred_probs.items(), key = lambda item: item[1], reverse=True))
+    return {
+        'predicted_probabilities' : sorted_pred_probs,
+        'predicted_class' : predicted_class,
+        'confidence_score' : str(round(np.max(probs),3)*100) + '%'
+    }
 
 @app.get('/')
 def index_route():
@@ -20,10 +83,24 @@ def index_route():
     """
     return {"Health" : "Ok"}
 
+@app.get('/ready')
+def readiness_route(response: Response):
+    """Readiness Endpoint (for load balancers and orchestrators)
+
+    Returns:
+        dict: Whether the warm-up inference is done (status code 503 until it is).
+    """
+    if not ready:
+        response.status_code = 503
+    return {"Ready" : ready}
+
 @app.post('/predict', response_model=StarTypePrediction)
-def prediction(sp: StarProperties):
+async def prediction(sp: StarProperties):
     """Endpoint for predicting the star type based on given star properties.
 
+    The stars missing from the cache are queued and sent through the model together with the
+    other requests arriving at the same moment (see MicroBatcher).
+
     Parameters:
         sp (StarProperties): The star properties including temperature, luminosity, radius, and absolute magnitude.
 
@@ -31,12 +108,69 @@ def prediction(sp: StarProperties):
         dict: A dictionary containing the predicted probabilities for each star type,
               the predicted star class, and the confidence score.
     """
-    input_features = [[sp.temperature, sp.luminosity, sp.radius, sp.abs_mag]]
-    predicted_class, probs, classes = make_predictions(model, input_features)
-    pred_probs = dict(zip(classes, probs))
-    sorted_pred_probs = dict(sorted(pred_probs.items(), key = lambda item: item[1], reverse=True))
-    return {
-        'predicted_probabilities' : sorted_pred_probs,
-        'predicted_class' : predicted_class,
-        'confidence_score' : str(round(np.max(probs),3)*100) + '%'
-    }
\ No newline at end of file
+    features = [sp.temperature, sp.luminosity, sp.radius, sp.abs_mag]
+    key = prediction_cache.make_key(features)
+    generation = prediction_cache.generation
+    cached = prediction_cache.get(key)
+    if cached is None:
+        predicted_class, probs, classes = await batcher.submit(features)
+        prediction_cache.put(key, (predicted_class, probs, classes), generation)
+        return format_prediction(predicted_class, probs, classes)
+    return format_prediction(*cached)
+
+@app.post('/predict/batch', response_model=List[StarTypePrediction])
+def batch_prediction(stars: List[StarProperties] = Body(max_length=MAX_BATCH_SIZE)):
+    """Endpoint for predicting the star types of many stars in one request.
+
+    All the stars are sent through the model as one matrix, in a single call.
+
+    Parameters:
+        stars (List[StarProperties]): The properties of every star (at most MAX_BATCH_SIZE stars,
+                                      set with the MAX_BATCH_SIZE environment variable).
+
+    Returns:
+        list: One prediction per star (same format as /predict), in the order of the request.
+    """
+    if not stars:
+        return []
+    input_features = [[sp.temperature, sp.luminosity, sp.radius, sp.abs_mag] for sp in stars]
+    keys = [prediction_cache.make_key(features) for features in input_features]
+    generation, current_model = prediction_cache.generation, model
+    results = [prediction_cache.get(key) for key in keys]
+
+    # Only the stars missing from the cache go through the model (still in one call)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        predicted_classes, probs, _ = make_batch_predictions(current_model, [input_features[i] for i in missing])
+        for i, predicted_class, star_probs in zip(missing, predicted_classes, probs):
+            results[i] = (predicted_class, star_probs.copy(), current_model.classes_)
+            prediction_cache.put(keys[i], results[i], generation)
+    return [format_prediction(*result) for result in results]
+
+@app.get('/cache/stats')
+def cache_stats():
+    """Endpoint for the counters of the prediction cache.
+
+    Returns:
+        dict: Entries, estimated bytes, hits, misses, hit rate, evictions, expirations and invalidations.
+    """
+    return prediction_cache.stats()
+
+@app.get('/batcher/stats')
+def batcher_stats():
+    """Endpoint for the counters of the micro-batching of /predict.
+
+    Returns:
+        dict: Queue depth, number of batches and requests, mean batch size and the batch size distribution.
+    """
+    return batcher.stats()
+
+@app.post('/model/reload')
+def model_reload():
+    """Endpoint for loading the model file again (e.g. after retraining), which invalidates the cache.
+
+    Returns:
+        dict: The reloaded model path and the number of cache invalidations so far.
+    """
+    reload_model()
+    return {"Reloaded" : MODEL_PATH, "Invalidations" : prediction_cache.invalidations}
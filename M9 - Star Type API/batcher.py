@@ -0,0 +1,123 @@
+import asyncio
+from collections import Counter
+
+class MicroBatcher:
+    """
+    Combine concurrent single predictions into batched model calls.
+
+    Every request puts its features and a future on a queue and waits for the future. A
+    worker task takes the first queued request, then collects the requests arriving within
+    `window` seconds (or until `max_size` requests), sends them through the model as one
+    matrix and resolves every future with its own row of the results.
+
+    The worker is started on the first request, in the event loop of the server.
+
+    Attributes:
+    - predict (function): Called with a list of feature rows, returns the predicted classes,
+      the (n_rows, n_classes) probabilities and the classes (like make_batch_predictions).
+    - window (float): Time to wait for more requests after the first one, in seconds.
+    - max_size (int): Largest number of requests in one batch.
+    - batches, items (int): Number of model calls and of requests sent through them.
+    - max_queue_depth (int): Largest number of waiting requests seen at the start of a batch.
+    """
+
+    def __init__(self, predict, window=0.002, max_size=64):
+        """
+        Initialize the batcher (the queue and the worker are created on the first request).
+
+        Parameters:
+        - predict (function): Batched prediction function (see the class attributes).
+        - window (float): Time to wait for more requests after the first one, in seconds.
+        - max_size (int): Largest number of requests in one batch.
+        """
+        self.predict = predict
+        self.window = window
+        self.max_size = max_size
+        self.batches = self.items = self.max_queue_depth = 0
+        self._sizes = Counter()
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, features):
+        """
+        Queue the features of one star and wait for its prediction.
+
+        Parameters:
+        - features (List[float]): Temperature, luminosity, radius and absolute magnitude.
+
+        Returns:
+        - Tuple[str, numpy.ndarray, List[str]]: The predicted class, the probabilities and the classes.
+        """
+        self._start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((features, future))
+        return await future
+
+    async def _collect(self):
+        """
+        Wait for the first request, then collect the requests arriving within the window.
+
+        Returns:
+        - list: (features, future) pairs of the batch.
+        """
+        queue, loop = self._queue, self._loop
+        batch = [await queue.get()]
+        self.max_queue_depth = max(self.max_queue_depth, queue.qsize() + 1)
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                predicted_classes, probs, classes = self.predict([features for features, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, future), predicted_class, star_probs in zip(batch, predicted_classes, probs):
+                # A caller that went away (e.g. a cancelled request) has a cancelled future
+                if not future.done():
+                    future.set_result((predicted_class, star_probs.copy(), classes))
+            self.batches += 1
+            self.items += len(batch)
+            self._sizes[len(batch)] += 1
+
+    def stats(self):
+        """
+        Return the counters of the batcher.
+
+        Returns:
+        - dict: Current and largest queue depth, number of batches and requests, mean batch size
+          and the number of batches of every size.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'window_ms': self.window * 1000,
+            'max_batch_size': self.max_size,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'batch_sizes': {str(size): count for size, count in sorted(self._sizes.items())},
+        }
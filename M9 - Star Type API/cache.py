@@ -0,0 +1,152 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+def estimate_size(value):
+    """
+    Estimate the memory used by a cached value.
+
+    Parameters:
+    - value (object): A value made of tuples/lists, NumPy arrays, strings and numbers.
+
+    Returns:
+    - int: Approximate size in bytes (the container and everything it holds).
+    """
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (0 if value.flags.owndata else value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of predictions with a time to live and a memory bound.
+
+    Entries are kept in least recently used order. An entry older than `ttl` seconds is
+    dropped when it is looked up, and the least recently used entries are evicted while
+    the estimated size of all the entries is above `max_bytes`.
+
+    Attributes:
+    - max_bytes (int): Memory bound of the entries in bytes (0 disables the cache).
+    - ttl (float): Time to live of an entry in seconds (None for no expiry).
+    - hits, misses (int): Number of lookups that found / did not find a valid entry.
+    - evictions (int): Number of entries evicted to stay within max_bytes.
+    - expirations (int): Number of entries dropped because they were older than ttl.
+    - invalidations (int): Number of times the whole cache was cleared (e.g. model reloads).
+    - generation (int): Incremented by every clear. A value computed before a clear (read generation
+      first, then compute) is not stored after it, so a reload never leaves stale entries.
+    """
+
+    def __init__(self, max_bytes=16*1024*1024, ttl=3600):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        - max_bytes (int): Memory bound of the entries in bytes (0 disables the cache).
+        - ttl (float): Time to live of an entry in seconds (None or 0 for no expiry).
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self.generation = 0
+        self._entries = OrderedDict()    # key -> (value, size, time stored)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(features):
+        """
+        Build the key of a star from its features.
+
+        Parameters:
+        - features (List[float]): Temperature, luminosity, radius and absolute magnitude.
+
+        Returns:
+        - tuple: The features as floats (equal inputs such as 5778 and 5778.0, or 0.0 and -0.0,
+          give the same key).
+        """
+        return tuple(float(feature) + 0.0 for feature in features)
+
+    def get(self, key):
+        """
+        Look up an entry, marking it as the most recently used.
+
+        Parameters:
+        - key (tuple): Key of the entry.
+
+        Returns:
+        - object: The cached value, or None if there is no valid entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, generation=None):
+        """
+        Store an entry, evicting the least recently used entries to stay within max_bytes.
+
+        Parameters:
+        - key (tuple): Key of the entry.
+        - value (object): Value to store.
+        - generation (int): The generation read before computing the value (None to always store).
+        """
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        """
+        Drop every entry (counted as one invalidation).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+            self.generation += 1
+
+    def stats(self):
+        """
+        Return the counters of the cache.
+
+        Returns:
+        - dict: Number of entries, estimated bytes and bound, hits, misses, hit rate, evictions,
+          expirations and invalidations.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -1,4 +1,6 @@
 import pickle
+from multiprocessing import shared_memory
+import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -15,19 +17,220 @@ def load_model(model_path):
     with open(model_path, 'rb') as f:
         return pickle.load(f)    
 
+class InferenceEngine:
+    """
+    NumPy-only inference for a StandardScaler + LogisticRegression pipeline.
+
+    The scaler mean/scale and the logistic regression coefficients are extracted from the
+    pipeline once, then every call is a single pass of NumPy operations (scaling, matrix
+    product, softmax) without the input validation and dispatch of scikit-learn. It has the
+    same `predict_proba` and `classes_` interface as the pipeline, so it can replace it.
+
+    Attributes:
+    - mean (numpy.ndarray): Mean of every feature (from the scaler).
+    - scale (numpy.ndarray): Scale of every feature (from the scaler).
+    - coef (numpy.ndarray): (n_classes, n_features) coefficients of the logistic regression.
+    - intercept (numpy.ndarray): Intercept of every class.
+    - classes_ (numpy.ndarray): The classes of the model.
+    - multinomial (bool): Whether the probabilities are a softmax (else one-vs-rest sigmoids).
+    """
+
+    def __init__(self, model):
+        """
+        Extract the parameters of a pipeline.
+
+        Parameters:
+        - model (object): A fitted pipeline of a StandardScaler followed by a LogisticRegression.
+
+        Raises:
+        - Exception: If the model is not such a pipeline.
+        """
+        steps = [step for _, step in getattr(model, 'steps', [])]
+        names = [type(step).__name__ for step in steps]
+        if names != ['StandardScaler', 'LogisticRegression']:
+            raise Exception(f'Invalid model. Expected a StandardScaler + LogisticRegression pipeline. Provided steps: {names}')
+        scaler, classifier = steps
+        n_features = classifier.coef_.shape[1]
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        self.scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        self.coef = classifier.coef_
+        self.intercept = classifier.intercept_
+        self.classes_ = classifier.classes_
+        multi_class = getattr(classifier, 'multi_class', 'auto')
+        self.multinomial = len(self.classes_) > 2 and (multi_class == 'multinomial' or
+                           (multi_class in ('auto', 'deprecated') and classifier.solver != 'liblinear'))
+
+    @classmethod
+    def from_arrays(cls, mean, scale, coef, intercept, classes, multinomial):
+        """
+        Build an engine from its parameters (without a scikit-learn model).
+
+        Parameters:
+        - mean, scale, coef, intercept (numpy.ndarray): The parameters (see the class attributes).
+        - classes (List[str]): The classes of the model.
+        - multinomial (bool): Whether the probabilities are a softmax.
+
+        Returns:
+        - InferenceEngine: The engine.
+        """
+        engine = cls.__new__(cls)
+        engine.mean, engine.scale, engine.coef, engine.intercept = mean, scale, coef, intercept
+        engine.classes_ = np.array(classes, dtype=object)
+        engine.multinomial = multinomial
+        return engine
+
+    def predict_proba(self, input_features):
+        """
+        Compute the probabilities of every class.
+
+        Parameters:
+        - input_features (List[List[float]]): Input features (one row per input).
+
+        Returns:
+        - numpy.ndarray: (n_inputs, n_classes) probabilities, in the order of classes_.
+        """
+        # Same operations, in the same order, as the scaler and the classifier of the pipeline
+        scores = ((np.asarray(input_features, dtype=float) - self.mean) / self.scale) @ self.coef.T + self.intercept
+        if len(self.classes_) == 2:
+            probabilities = 1 / (1 + np.exp(-scores[:, 0]))
+            return np.column_stack((1 - probabilities, probabilities))
+        if not self.multinomial:
+            scores = 1 / (1 + np.exp(-scores))
+            return scores / scores.sum(axis=1).reshape((-1, 1))
+        scores -= scores.max(axis=1).reshape((-1, 1))
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1).reshape((-1, 1))
+        return scores
+
+def check_parity(engine, model, samples=1000, seed=0):
+    """
+    Compare the outputs of an InferenceEngine with the pipeline it was built from.
+
+    The inputs are drawn around the training data (mean +/- a few scales of every feature),
+    including negative values, so that every class and the whole softmax range are exercised.
+
+    Parameters:
+    - engine (InferenceEngine): The engine to check.
+    - model (object): The pipeline the engine was built from.
+    - samples (int): Number of random inputs to compare.
+    - seed (int): Seed of the random inputs.
+
+    Returns:
+    - float: Largest absolute difference between the probabilities (0 when identical), or infinity
+      if a predicted class differs.
+    """
+    rng = np.random.default_rng(seed)
+    inputs = engine.mean + engine.scale * rng.normal(scale=3, size=(samples, len(engine.mean)))
+    expected, probabilities = model.predict_proba(inputs), engine.predict_proba(inputs)
+    if not np.array_equal(model.predict(inputs), engine.classes_[np.argmax(probabilities, axis=1)]):
+        return np.inf
+    return float(np.max(np.abs(expected - probabilities)))
+
+def load_inference_engine(model, tolerance=0.0):
+    """
+    Build the NumPy-only InferenceEngine of a model, if it matches the model.
+
+    Parameters:
+    - model (object): The pre-trained model.
+    - tolerance (float): Largest difference of the probabilities allowed by the parity check
+      (default is 0: the outputs must be identical).
+
+    Returns:
+    - object: The InferenceEngine when the model is supported and passes check_parity, else the
+      model itself (both have the same predict_proba and classes_ interface).
+    """
+    try:
+        engine = InferenceEngine(model)
+    except Exception as error:
+        warnings.warn(f'Using the scikit-learn model: {error}')
+        return model
+    difference = check_parity(engine, model)
+    if difference > tolerance:
+        warnings.warn(f'Using the scikit-learn model: the NumPy engine differs by {difference}')
+        return model
+    return engine
+
+# Environment variable holding the description of the shared engine, for the worker processes
+SHARED_MODEL_ENV = 'STAR_API_SHARED_MODEL'
+SHARED_ARRAYS = ('mean', 'scale', 'coef', 'intercept')
+
+def share_engine(engine):
+    """
+    Copy the parameters of an InferenceEngine into a shared memory block.
+
+    Parameters:
+    - engine (InferenceEngine): The engine to share.
+
+    Returns:
+    - Tuple[SharedMemory, dict]: The shared memory block (to be closed and unlinked by its owner
+      when the workers are done) and its JSON-serializable description for attach_engine.
+    """
+    arrays = [np.ascontiguousarray(getattr(engine, name), dtype=np.float64) for name in SHARED_ARRAYS]
+    block = shared_memory.SharedMemory(create=True, size=sum(array.nbytes for array in arrays))
+    layout, offset = {}, 0
+    for name, array in zip(SHARED_ARRAYS, arrays):
+        np.ndarray(array.shape, dtype=np.float64, buffer=block.buf, offset=offset)[...] = array
+        layout[name] = [offset, list(array.shape)]
+        offset += array.nbytes
+    description = {'name': block.name, 'arrays': layout, 'classes': [str(c) for c in engine.classes_],
+                   'multinomial': bool(engine.multinomial)}
+    return block, description
+
+def attach_engine(description):
+    """
+    Build an InferenceEngine on the parameters shared by share_engine (in another process).
+
+    The arrays are read-only views of the shared memory block, so no process unpickles the
+    model or imports scikit-learn, and the parameters exist once in memory.
+
+    Parameters:
+    - description (dict): The description returned by share_engine.
+
+    Returns:
+    - InferenceEngine: The engine (it keeps the shared memory block open).
+    """
+    block = shared_memory.SharedMemory(name=description['name'])
+    arrays = {}
+    for name, (offset, shape) in description['arrays'].items():
+        arrays[name] = np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=offset)
+        arrays[name].flags.writeable = False
+    engine = InferenceEngine.from_arrays(classes=description['classes'], multinomial=description['multinomial'],
+                                         **arrays)
+    engine.shared_memory = block
+    return engine
+
 def make_predictions(model, input_features):
     """
     Make predictions using a loaded model and input features.
 
     Parameters:
-    - model (object): The pre-trained model.
+    - model (object): The pre-trained model (or its InferenceEngine).
     - input_features (List[List[float]]): Input features for making predictions.
 
     Returns:
     - Tuple[str, List[float], List[str]]: A tuple containing the predicted class, probabilities, and classes.
     """
-    predict_class = model.predict(input_features)[0]
     probabilities = model.predict_proba(input_features)[0]
     classes = model.classes_
+    # The predicted class is the one with the highest probability (same as model.predict)
+    predict_class = classes[np.argmax(probabilities)]
     return predict_class, probabilities, classes
 
+
+def make_batch_predictions(model, input_features):
+    """
+    Make predictions for many inputs using a loaded model, with a single call of the model.
+
+    Parameters:
+    - model (object): The pre-trained model (or its InferenceEngine).
+    - input_features (List[List[float]]): Input features for making predictions (one row per input).
+
+    Returns:
+    - Tuple[List[str], numpy.ndarray, List[str]]: A tuple containing the predicted class of every input,
+      the (n_inputs, n_classes) probabilities, and the classes.
+    """
+    probabilities = model.predict_proba(input_features)
+    classes = model.classes_
+    # The predicted class is the one with the highest probability (same as model.predict)
+    predict_classes = classes[np.argmax(probabilities, axis=1)]
+    return predict_classes, probabilities, classes
@@ -0,0 +1,46 @@
+# Standard Imports
+import os
+import json
+import argparse
+import uvicorn
+
+# Local Imports
+from predictor import InferenceEngine, share_engine, SHARED_MODEL_ENV
+import api
+
+def parse_arguments():
+    """Parse the command line arguments.
+
+    Returns:
+        argparse.Namespace: host, port and number of worker processes.
+    """
+    parser = argparse.ArgumentParser(description='Serve the Star Type API with a model shared by all the workers.')
+    parser.add_argument('--host', default='127.0.0.1', help='IP address to listen on (default is 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default is 8000).')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes (default is the number of CPUs).')
+    return parser.parse_args()
+
+def main():
+    """Load the model once, share it with the workers and run them.
+
+    The model is unpickled and checked once, here (by importing api). The parameters of its NumPy inference engine are
+    copied into shared memory, whose description is passed to the workers in the
+    SHARED_MODEL_ENV environment variable: every worker attaches to the same read-only parameters
+    instead of unpickling model.pkl (and importing scikit-learn) itself. This process serves no requests, so
+    every worker warms itself up at startup (see api.lifespan).
+    """
+    args = parse_arguments()
+    engine = api.model
+    if not isinstance(engine, InferenceEngine):
+        raise Exception('Invalid model. Only a model served by the NumPy inference engine can be shared.')
+
+    block, description = share_engine(engine)
+    os.environ[SHARED_MODEL_ENV] = json.dumps(description)
+    try:
+        uvicorn.run('api:app', host=args.host, port=args.port, workers=args.workers)
+    finally:
+        block.close()
+        block.unlink()
+
+if __name__ == '__main__':
+    main()
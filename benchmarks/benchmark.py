@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from time import perf_counter
+
+# Run without a display (Pygame) and without a GUI backend (Matplotlib)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+M5_DIR = os.path.join(ROOT, "M5 - Earth's Orbit around the Sun")
+M6_DIR = os.path.join(ROOT, 'M6 - Solar System Simulator')
+sys.path[:0] = [M6_DIR, M5_DIR]
+
+import numpy as np
+import pygame as pg
+from physics import NBodySystem
+from integrators import FORCE_EVALUATIONS
+from solar_system import SolarSystemBodies
+from simulation import simulate_bodies
+import utils as orbit_utils
+
+"""
+Headless benchmark suite for the N-body (M6) and orbit (M5) kernels.
+
+Every case integrates a fixed, seeded initial state and reports:
+- steps_per_second: Integration steps per second of wall time.
+- time_per_force_evaluation_us: Wall time per evaluation of the accelerations of all the bodies.
+- peak_memory_mb: Peak memory (tracemalloc) of the setup and the first MEMORY_STEPS steps.
+- energy_error: Relative energy error |E - E0| / |E0| at the end of the run.
+
+Kernels:
+- m6.step: NBodySystem.step (leapfrog, direct sum).
+- m6.step_barnes_hut: NBodySystem.step (leapfrog, Barnes-Hut), only from NBodySystem.TREE_MIN_BODIES
+  bodies upward (below it the solver sums directly).
+- m6.update_position: SolarSystemBodies.update_position called for every body.
+- m6.simulate_bodies: simulate_bodies (physics and drawing) on an offscreen surface.
+  Both run with orbit tracking off, so their peak memory is the memory of the engine and not of
+  the orbit trails.
+- m5.euler / m5.rk4: euler_method / rk4_method of M5 utils.py with the initial conditions of config.json.
+- m5.euler_fast / m5.rk4_fast: euler_method_fast / rk4_method_fast (the default "fast" backend).
+
+A case stops early (and is marked as truncated) once it has run for max_seconds. The results are
+written as JSON, and --compare prints the change of steps/s against a previous results file.
+
+Usage:
+    python benchmarks/benchmark.py --suite standard --output benchmark_results.json
+    python benchmarks/benchmark.py --compare benchmark_results_old.json
+"""
+
+SUITES = {
+    'quick': {'bodies': [5, 100, 1000], 'nbody_steps': [1000], 'orbit_steps': [100_000], 'max_seconds': 5},
+    'standard': {'bodies': [5, 100, 1000, 10_000], 'nbody_steps': [100_000],
+                 'orbit_steps': [100_000, 1_000_000, 10_000_000], 'max_seconds': 30},
+    'full': {'bodies': [5, 100, 1000, 10_000], 'nbody_steps': [100_000, 1_000_000, 10_000_000],
+             'orbit_steps': [100_000, 1_000_000, 10_000_000], 'max_seconds': None},
+}
+MEMORY_STEPS = 10          # Steps run while tracing the peak memory
+TIME_STEP = 24*3600        # Time step of the N-body kernels in seconds
+
+# Sun and the planets of create_bodies.py: (x in AU, mass in Kg, y_vel in m/s)
+PLANETS = [(0, 1.989e30, 0), (0.39, 0.33e24, -47.4e3), (0.72, 4.87e24, -35e3), (-1, 5.97e24, 29.8e3),
+           (-1.52, 0.642e24, 24.1e3)]
+
+def make_system(num_bodies, solver='direct', seed=0):
+    """
+    Create a reproducible system of the Sun, the planets of create_bodies.py and random minor bodies.
+
+    Parameters:
+    - num_bodies (int): Number of bodies (the first 5 are the Sun and the planets).
+    - solver (str): Force solver of the system (default is "direct").
+    - seed (int): Seed of the random bodies (default is 0).
+
+    Returns:
+    - NBodySystem: System integrated with leapfrog.
+    """
+    AU = SolarSystemBodies.AU
+    system = NBodySystem(capacity=num_bodies, solver=solver, integrator='leapfrog')
+    for index, (x, mass, y_vel) in enumerate(PLANETS[:num_bodies]):
+        system.add_body(x*AU, 0, mass, 0, y_vel, sun=index == 0)
+    extra = num_bodies - len(PLANETS)
+    if extra > 0:
+        rng = np.random.default_rng(seed)
+        radius = rng.uniform(0.3, 5, extra) * AU
+        angle = rng.uniform(0, 2*np.pi, extra)
+        speed = np.sqrt(NBodySystem.G * PLANETS[0][1] / radius)
+        positions = np.column_stack([np.cos(angle), np.sin(angle)]) * radius[:, np.newaxis]
+        velocities = np.column_stack([np.sin(angle), -np.cos(angle)]) * speed[:, np.newaxis]
+        system.add_bodies(positions, velocities, rng.uniform(1e20, 1e23, extra))
+    return system
+
+# Class Info
+"""
+Benchmark cases. Each one holds its initial state and implements:
+- advance: Integrates a number of steps.
+- energy: Returns the current energy (the total energy, or the specific orbital energy for M5).
+- evaluations_per_step: Number of force evaluations (of all the bodies) per step.
+"""
+
+class NBodyStep:
+
+    def __init__(self, num_bodies, steps, solver='direct'):
+        self.system = make_system(num_bodies, solver)
+        self.evaluations_per_step = FORCE_EVALUATIONS['leapfrog']
+
+    def advance(self, steps):
+        for _ in range(steps):
+            self.system.step(TIME_STEP)
+
+    def energy(self):
+        return self.system.total_energy()
+
+class UpdatePosition(NBodyStep):
+
+    def __init__(self, num_bodies, steps):
+        super().__init__(num_bodies, steps)
+        self.bodies = [SolarSystemBodies.from_system(self.system, index, f'Body {index}', (255, 255, 255), 1)
+                       for index in range(num_bodies)]
+
+    def advance(self, steps):
+        for _ in range(steps):
+            for body in self.bodies:
+                body.update_position(self.bodies, track_orbit=False)
+
+class SimulateBodies(UpdatePosition):
+
+    WIDTH, HEIGHT = 1280, 720
+
+    def __init__(self, num_bodies, steps):
+        super().__init__(num_bodies, steps)
+        pg.font.init()
+        self.window = pg.Surface((self.WIDTH, self.HEIGHT))
+        self.font = pg.font.SysFont(name='Sans', size=18, bold=True)
+
+    def advance(self, steps):
+        for _ in range(steps):
+            simulate_bodies(self.window, self.WIDTH, self.HEIGHT, self.font, self.font, self.font, self.bodies,
+                            track_orbit=False)
+
+class OrbitKernel:
+
+    G = 6.6743e-11
+    M_SUN = 1.989e30
+
+    def __init__(self, num_bodies, steps, method):
+        config = orbit_utils.read_json_config(os.path.join(M5_DIR, 'config.json'))
+        self.dt = config['time_settings']['time_step']
+        self.method = method
+        self.evaluations_per_step = 1 if method in (orbit_utils.euler_method, orbit_utils.euler_method_fast) else 4
+        self.r = np.empty((steps + 1, 2))
+        self.v = np.empty((steps + 1, 2))
+        self.r[0] = config['initial_conditions']['position_at_perihelion']*1e9, 0
+        self.v[0] = 0, -config['initial_conditions']['velocity_at_perihelion']*1e3
+        self.index = 0
+
+    def advance(self, steps):
+        stop = self.index + steps
+        if self.method in (orbit_utils.euler_method_fast, orbit_utils.rk4_method_fast):
+            self.method(self.G, self.M_SUN, self.r[self.index:stop + 1], self.v[self.index:stop + 1], self.dt)
+        else:
+            self.method(self.G, self.M_SUN, self.r[self.index:stop + 1], self.v[self.index:stop + 1],
+                        orbit_utils.accn, self.dt)
+        self.index = stop
+
+    def energy(self):
+        r, v = self.r[self.index], self.v[self.index]
+        return 0.5*np.dot(v, v) - self.G*self.M_SUN/np.linalg.norm(r)
+
+KERNELS = {
+    'm6.step': NBodyStep,
+    'm6.step_barnes_hut': lambda bodies, steps: NBodyStep(bodies, steps, solver='barnes_hut'),
+    'm6.update_position': UpdatePosition,
+    'm6.simulate_bodies': SimulateBodies,
+    'm5.euler': lambda bodies, steps: OrbitKernel(bodies, steps, orbit_utils.euler_method),
+    'm5.rk4': lambda bodies, steps: OrbitKernel(bodies, steps, orbit_utils.rk4_method),
+    'm5.euler_fast': lambda bodies, steps: OrbitKernel(bodies, steps, orbit_utils.euler_method_fast),
+    'm5.rk4_fast': lambda bodies, steps: OrbitKernel(bodies, steps, orbit_utils.rk4_method_fast),
+}
+
+def run_case(kernel, num_bodies, steps, max_seconds=None):
+    """
+    Run one benchmark case.
+
+    Parameters:
+    - kernel (str): Name of the kernel (one of KERNELS).
+    - num_bodies (int): Number of bodies.
+    - steps (int): Number of integration steps.
+    - max_seconds (float): Wall time after which the case stops early (default is no limit).
+
+    Returns:
+    - dict: Case, completed steps, wall time and the metrics of the suite.
+    """
+    # Peak memory of the setup and the first steps (traced separately, tracing slows the run down)
+    tracemalloc.start()
+    KERNELS[kernel](num_bodies, steps).advance(min(MEMORY_STEPS, steps))
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    case = KERNELS[kernel](num_bodies, steps)
+    energy_0 = case.energy()
+    done, chunk = 0, 1
+    start = perf_counter()
+    while done < steps:
+        chunk_start = perf_counter()
+        chunk = min(chunk, steps - done)
+        case.advance(chunk)
+        done += chunk
+        if max_seconds is not None and perf_counter() - start > max_seconds:
+            break
+        # Grow the chunks while they are short, so the time limit is checked about every 0.1 s
+        if perf_counter() - chunk_start < 0.1:
+            chunk *= 2
+    wall_time = perf_counter() - start
+    evaluations = done * case.evaluations_per_step
+    return {
+        'kernel': kernel,
+        'bodies': num_bodies,
+        'steps': steps,
+        'steps_completed': done,
+        'truncated': done < steps,
+        'wall_time': wall_time,
+        'steps_per_second': done / wall_time,
+        'time_per_force_evaluation_us': wall_time / evaluations * 1e6,
+        'peak_memory_mb': peak_memory / 2**20,
+        'energy_error': float(abs(case.energy() - energy_0) / abs(energy_0)),
+    }
+
+def suite_cases(suite, kernels=None):
+    """
+    List the cases of a suite.
+
+    Parameters:
+    - suite (dict): Entry of SUITES.
+    - kernels (list): Names of the kernels to run (default is every kernel).
+
+    Returns:
+    - list: Tuples of (kernel, bodies, steps).
+    """
+    cases = []
+    for kernel in kernels or KERNELS:
+        if kernel.startswith('m5.'):
+            cases += [(kernel, 1, steps) for steps in suite['orbit_steps']]
+        else:
+            cases += [(kernel, bodies, steps) for bodies in suite['bodies'] for steps in suite['nbody_steps']
+                      if kernel != 'm6.step_barnes_hut' or bodies >= NBodySystem.TREE_MIN_BODIES]
+    return cases
+
+def environment():
+    """
+    Describe the machine and the code the benchmark ran on.
+
+    Returns:
+    - dict: Timestamp, git commit, Python/NumPy versions, platform and CPU count.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare(results, previous):
+    """
+    Print the change of steps/s of every case against previous results.
+
+    Parameters:
+    - results (list): Results of this run.
+    - previous (list): Results of a previous run.
+
+    Returns:
+    None
+    """
+    before = {(r['kernel'], r['bodies'], r['steps']): r for r in previous}
+    print(f"\n{'kernel':<20}{'bodies':>8}{'steps':>10}{'before':>14}{'after':>14}{'change':>9}")
+    for result in results:
+        old = before.get((result['kernel'], result['bodies'], result['steps']))
+        if old is None:
+            continue
+        change = result['steps_per_second'] / old['steps_per_second']
+        print(f"{result['kernel']:<20}{result['bodies']:>8}{result['steps']:>10.0e}"
+              f"{old['steps_per_second']:>14.1f}{result['steps_per_second']:>14.1f}{change:>8.2f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the N-body (M6) and orbit (M5) kernels headless.')
+    parser.add_argument('--suite', choices=list(SUITES), default='quick', help='Scales to run.')
+    parser.add_argument('--kernels', nargs='+', choices=list(KERNELS), help='Kernels to run (default is all).')
+    parser.add_argument('--max-seconds', type=float, help='Time limit of every case (default set by the suite).')
+    parser.add_argument('--output', default='benchmark_results.json', help='Path of the JSON results.')
+    parser.add_argument('--compare', help='Path of previous JSON results to compare with.')
+    args = parser.parse_args()
+
+    suite = SUITES[args.suite]
+    max_seconds = args.max_seconds if args.max_seconds is not None else suite['max_seconds']
+    results = []
+    print(f"{'kernel':<20}{'bodies':>8}{'steps':>10}{'steps/s':>12}{'us/force':>12}{'peak MB':>10}{'energy err':>12}")
+    for kernel, bodies, steps in suite_cases(suite, args.kernels):
+        result = run_case(kernel, bodies, steps, max_seconds)
+        results.append(result)
+        print(f"{kernel:<20}{bodies:>8}{steps:>10.0e}{result['steps_per_second']:>12.1f}"
+              f"{result['time_per_force_evaluation_us']:>12.2f}{result['peak_memory_mb']:>10.2f}"
+              f"{result['energy_error']:>12.2e}{' (truncated)' if result['truncated'] else ''}")
+
+    with open(args.output, 'w') as file:
+        json.dump({'suite': args.suite, 'max_seconds': max_seconds, 'environment': environment(),
+                   'results': results}, file, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file)['results'])
@@ -0,0 +1,211 @@
+import os
+import sys
+import tempfile
+
+# Run without a display (Pygame) and without a GUI backend (Matplotlib)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+M5_DIR = os.path.join(ROOT, "M5 - Earth's Orbit around the Sun")
+M6_DIR = os.path.join(ROOT, 'M6 - Solar System Simulator')
+sys.path[:0] = [M6_DIR, M5_DIR]
+
+import numpy as np
+import pygame as pg
+from create_bodies import solar_system_bodies
+from simulation import load_body_catalog, simulate_and_update, simulate_bodies, update_bodies
+from solar_system import SolarSystemBodies
+from benchmark import make_system
+from physics import NBodySystem
+import utils as orbit_utils
+
+"""
+Headless regression checks of the N-body (M6) and orbit (M5) modules.
+
+Every check returns a short description of what it measured and raises an AssertionError
+when the behaviour is wrong. The script exits with status 1 if any check fails.
+
+Checks:
+- catalog_without_trails: A 10k-body catalog scene simulated with orbit tracking off (with
+  simulate_and_update and simulate_bodies) never allocates an orbit trail.
+- catalog_sun: A catalog with its own Sun replaces the Sun of create_bodies.py.
+- standalone_bodies: Bodies built without a shared NBodySystem (the original constructor) still
+  attract each other through update_position and update_bodies.
+- block_after_set_state: A block time step after NBodySystem.set_state (e.g. a replay seek) gives
+  the same result as a new scheduler started from that state.
+- barnes_hut_accuracy: At the default theta the Barnes-Hut accelerations of 3000 bodies stay within
+  TREE_ERROR_BOUNDS of the direct sum, and below min_tree_bodies the solver is the direct sum.
+- m5_backend_parity: The "fast" and "numpy" backends of M5 agree within BACKEND_RTOL (relative to
+  |r| and |v|) on the default config.json, with Euler and RK4.
+- m5_stream_parity: stream_orbit gives the same orbit as one long run of numerical_integration on the
+  default config.json (exactly for Euler and RK4, within BACKEND_RTOL for the adaptive RK45).
+
+Usage:
+    python benchmarks/checks.py
+"""
+
+CATALOG_BODIES = 10_000
+CHECK_FRAMES = 5
+WIDTH, HEIGHT = 640, 480
+BACKEND_RTOL = 1e-12
+TREE_BODIES = 3000
+# Largest median and 99th percentile relative errors of the tree: (cloud of comparable masses, solar scene)
+TREE_ERROR_BOUNDS = {'cloud': (5e-3, 5e-2), 'solar': (1e-5, 1e-4)}
+
+def _write_catalog(path, rows):
+    """
+    Write a CSV catalog.
+
+    Parameters:
+    - path (str): Path of the CSV file.
+    - rows (list): Rows of the catalog (name, x, y, mass, x_vel, y_vel, sun).
+
+    Returns:
+    None
+    """
+    with open(path, 'w') as file:
+        file.write('name,x,y,mass,x_vel,y_vel,sun\n')
+        file.writelines(','.join(str(value) for value in row) + '\n' for row in rows)
+
+def check_catalog_without_trails(directory):
+    rng = np.random.default_rng(0)
+    radius = rng.uniform(2.1, 3.3, CATALOG_BODIES)
+    angle = rng.uniform(0, 2*np.pi, CATALOG_BODIES)
+    speed = np.sqrt(6.6743e-11 * 1.989e30 / (radius * 1.496e11))
+    rows = [(f'Minor {i}', radius[i]*np.cos(angle[i]), radius[i]*np.sin(angle[i]), 0,
+             -speed[i]*np.sin(angle[i]), speed[i]*np.cos(angle[i]), 0) for i in range(CATALOG_BODIES)]
+    path = os.path.join(directory, 'minor_bodies.csv')
+    _write_catalog(path, rows)
+    load_body_catalog(path)
+
+    pg.font.init()
+    window, background = pg.Surface((WIDTH, HEIGHT)), pg.Surface((WIDTH, HEIGHT))
+    font = pg.font.SysFont(name='Sans', size=12, bold=True)
+    accumulator = 0.0
+    for _ in range(CHECK_FRAMES):
+        accumulator, _ = simulate_and_update(window, WIDTH, HEIGHT, font, font, font, solar_system_bodies, False,
+                                             background, accumulator, 1/30)
+        simulate_bodies(window, WIDTH, HEIGHT, font, font, font, solar_system_bodies, track_orbit=False)
+    trails = sum(body._orbit is not None for body in solar_system_bodies)
+    assert trails == 0, f'{trails} of {len(solar_system_bodies)} bodies allocated an orbit trail'
+    return f'{len(solar_system_bodies)} bodies, {CHECK_FRAMES} frames, no orbit trail'
+
+def check_catalog_sun(directory):
+    path = os.path.join(directory, 'new_sun.csv')
+    _write_catalog(path, [('New Sun', 0, 0, 1.989e30, 0, 0, 1)])
+    load_body_catalog(path)
+    suns = [body.name for body in solar_system_bodies if body.sun]
+    system = solar_system_bodies[0].system
+    assert suns == ['New Sun'], f'Bodies marked as the Sun: {suns}'
+    assert solar_system_bodies[system.sun_index].name == 'New Sun', 'sun_index does not point to the new Sun'
+    return 'only the Sun of the catalog is marked as the Sun'
+
+def check_standalone_bodies(directory):
+    AU = SolarSystemBodies.AU
+    positions = []
+    for advance in ('update_position', 'update_bodies'):
+        sun = SolarSystemBodies('Sun', (255, 255, 0), 0, 0, 1.98892e30, 30, 0, sun=True)
+        earth = SolarSystemBodies('Earth', (0, 0, 255), -1, 0, 5.9742e24, 16, 29783)
+        bodies = [sun, earth]
+        for _ in range(100):
+            if advance == 'update_bodies':
+                update_bodies(bodies, track_orbit=False)
+            else:
+                for body in bodies:
+                    body.update_position(bodies)
+        # A quarter of an orbit takes about 91 days (steps)
+        assert abs(np.hypot(earth.x, earth.y)/AU - 1) < 0.02, f'{advance}: Earth left its orbit ({earth.x/AU:.3f}, {earth.y/AU:.3f}) AU'
+        assert abs(earth.distance_to_sun/AU - 1) < 0.02, f'{advance}: distance_to_sun is {earth.distance_to_sun/AU:.3f} AU'
+        positions.append(f'{advance} ({earth.x/AU:.3f}, {earth.y/AU:.3f}) AU')
+    return 'Earth after 100 days: ' + ', '.join(positions)
+
+def check_block_after_set_state(directory):
+    system, fresh = make_system(50), make_system(50)
+    system.integrator = fresh.integrator = 'block'
+    positions, velocities = system.pos.copy(), system.vel.copy()
+    for _ in range(20):
+        system.step(SolarSystemBodies.TIME_STEP)
+    system.set_state(positions, velocities, 0.0)
+    system.step(SolarSystemBodies.TIME_STEP)
+    fresh.step(SolarSystemBodies.TIME_STEP)
+    error = np.abs(system.pos - fresh.pos).max()
+    assert error == 0, f'The block step after set_state differs by {error:.3g} m from a new scheduler'
+    return '50 bodies, identical to a new scheduler after set_state'
+
+def check_barnes_hut_accuracy(directory):
+    rng = np.random.default_rng(0)
+    cloud = NBodySystem(capacity=TREE_BODIES, solver='barnes_hut')
+    cloud.add_bodies(rng.uniform(-1.5e11, 1.5e11, (TREE_BODIES, 2)), np.zeros((TREE_BODIES, 2)),
+                     rng.uniform(1e20, 1e23, TREE_BODIES))
+    results = []
+    for scene, system in (('cloud', cloud), ('solar', make_system(TREE_BODIES, solver='barnes_hut'))):
+        accuracy = system.solver_accuracy()
+        median_bound, p99_bound = TREE_ERROR_BOUNDS[scene]
+        assert accuracy['median_rel_error'] <= median_bound and accuracy['p99_rel_error'] <= p99_bound, \
+            f"{scene}: median {accuracy['median_rel_error']:.2e}, p99 {accuracy['p99_rel_error']:.2e} (theta={accuracy['theta']})"
+        results.append(f"{scene} median {accuracy['median_rel_error']:.1e} p99 {accuracy['p99_rel_error']:.1e}")
+
+    small = make_system(NBodySystem.TREE_MIN_BODIES - 1, solver='barnes_hut')
+    assert np.array_equal(small.accelerations(small.pos), small.direct_accelerations()), \
+        f'Below {NBodySystem.TREE_MIN_BODIES} bodies the Barnes-Hut solver does not use the direct sum'
+    return f'theta={cloud.theta}, {TREE_BODIES} bodies: ' + ', '.join(results)
+
+def check_m5_backend_parity(directory):
+    config = orbit_utils.read_json_config(os.path.join(M5_DIR, 'config.json'))
+    time_step = config['time_settings']['time_step']
+    steps = len(np.arange(0, config['time_settings']['simulation_time']*24*3600, time_step))
+    results = []
+    for method in ('euler', 'rk4'):
+        states = {}
+        for backend in ('fast', 'numpy'):
+            r, v = np.empty((steps, 2)), np.empty((steps, 2))
+            r[0] = config['initial_conditions']['position_at_perihelion']*1e9, 0
+            v[0] = 0, -config['initial_conditions']['velocity_at_perihelion']*1e3
+            orbit_utils.numerical_integration(6.6743e-11, 1.989e30, r, v, orbit_utils.accn, time_step, method, backend)
+            states[backend] = r, v
+        for name, fast, reference in zip('rv', states['fast'], states['numpy']):
+            error = np.max(np.abs(fast - reference) / np.linalg.norm(reference, axis=1)[:, None])
+            assert error <= BACKEND_RTOL, f'{method} {name} differs by {error:.2e} (relative) between the backends'
+            results.append(f'{method} {name} {error:.1e}')
+    return f'{steps} steps, largest relative differences: ' + ', '.join(results)
+
+def check_m5_stream_parity(directory):
+    config = orbit_utils.read_json_config(os.path.join(M5_DIR, 'config.json'))
+    time_step = config['time_settings']['time_step']
+    steps = len(np.arange(0, config['time_settings']['simulation_time']*24*3600, time_step))
+    r0 = np.array([config['initial_conditions']['position_at_perihelion']*1e9, 0])
+    v0 = np.array([0, -config['initial_conditions']['velocity_at_perihelion']*1e3])
+    results = []
+    for method, tolerance in (('euler', 0), ('rk4', 0), ('rk45', BACKEND_RTOL)):
+        r, v = np.empty((steps, 2)), np.empty((steps, 2))
+        r[0], v[0] = r0, v0
+        orbit_utils.numerical_integration(6.6743e-11, 1.989e30, r, v, orbit_utils.accn, time_step, method)
+        chunks = list(orbit_utils.stream_orbit(6.6743e-11, 1.989e30, r0, v0, orbit_utils.accn, time_step, steps,
+                                               method, chunk_size=1000))
+        streamed = np.concatenate([chunk[1] for chunk in chunks])
+        error = np.max(np.abs(streamed - r) / np.linalg.norm(r, axis=1)[:, None])
+        assert error <= tolerance, f'{method} stream differs by {error:.2e} (relative) from one long run'
+        results.append(f'{method} {error:.1e}')
+    return f'{steps} steps in chunks of 1000, largest relative differences: ' + ', '.join(results)
+
+CHECKS = {
+    'catalog_without_trails': check_catalog_without_trails,
+    'catalog_sun': check_catalog_sun,
+    'standalone_bodies': check_standalone_bodies,
+    'block_after_set_state': check_block_after_set_state,
+    'barnes_hut_accuracy': check_barnes_hut_accuracy,
+    'm5_backend_parity': check_m5_backend_parity,
+    'm5_stream_parity': check_m5_stream_parity,
+}
+
+if __name__ == '__main__':
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, check in CHECKS.items():
+            try:
+                print(f'PASS {name}: {check(directory)}')
+            except AssertionError as error:
+                failures += 1
+                print(f'FAIL {name}: {error}')
+    sys.exit(1 if failures else 0)